@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.database.db import pool_status
+from app.middleware.load_shedding import get_load_limiter
+from app.middleware.profiling import profile_client_allowed, profile_store
+from app.services.autocomplete import autocomplete_cache
+from app.services.coalesce import coalescer
+from app.services.idempotency import idempotency
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+
+
+def require_profile_client(request: Request) -> None:
+    """
+    Restricts profile downloads to the clients allowed to capture profiles.
+
+    Profiles hold SQL statements and stacks from other users' requests.
+
+    :param request: The incoming request.
+    :type request: Request
+    :raises HTTPException: If the client is not in ``profile_allowed_ips``.
+    """
+    if not profile_client_allowed(request.client.host if request.client else None):
+        raise HTTPException(status_code=403, detail="Not allowed to read profiles")
+
+
+@router.get('/coalescing')
+async def get_coalescing_stats():
+    """
+    Reports how many contact reads this worker ran and how many it served from a shared query.
+
+    :return: Counters of executed queries and of requests that reused another's result.
+    :rtype: dict
+    """
+
+    stats = dict(coalescer.stats)
+    stats["saved"] = stats["shared_local"] + stats["shared_remote"]
+    return stats
+
+
+@router.get('/idempotency')
+async def get_idempotency_stats():
+    """
+    Reports how many keyed writes this worker ran and how many retries it answered by replay.
+
+    :return: Counters of executed and replayed writes.
+    :rtype: dict
+    """
+
+    return dict(idempotency.stats)
+
+
+@router.get('/autocomplete')
+async def get_autocomplete_stats():
+    """
+    Reports how many users have a cached autocomplete index on this worker and its estimated size.
+
+    :return: Cached users, estimated bytes, and hit, miss, eviction and invalidation counters.
+    :rtype: dict
+    """
+
+    return autocomplete_cache.status()
+
+
+@router.get('/db-pool')
+async def get_db_pool_status():
+    """
+    Reports this worker's database pool occupancy.
+
+    :return: Pool size, checked-out and idle connections, and current overflow.
+    :rtype: dict
+    """
+
+    return pool_status()
+
+
+@router.get('/load-shedding')
+async def get_load_shedding_stats():
+    """
+    Reports the adaptive concurrency limit of this worker and how many requests were queued or shed.
+
+    :return: Current limit, in-flight and queued requests, and counters.
+    :rtype: dict
+    """
+
+    return get_load_limiter().status()
+
+
+@router.get('/profiles', dependencies=[Depends(require_profile_client)])
+def list_profiles():
+    """
+    Lists the most recent request profiles, newest first.
+
+    :return: Profile summaries with SQL and Redis timings.
+    :rtype: list[dict]
+    """
+
+    return profile_store.list()
+
+
+@router.get('/profiles/{profile_id}', dependencies=[Depends(require_profile_client)])
+def get_profile(profile_id: str):
+    """
+    Returns one request profile with its SQL and Redis timings.
+
+    :param profile_id: Id from the ``X-Profile-Id`` response header.
+    :type profile_id: str
+    :return: The profile summary.
+    :rtype: dict
+    """
+
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get('/profiles/{profile_id}/folded', response_class=PlainTextResponse,
+            dependencies=[Depends(require_profile_client)])
+def get_profile_folded(profile_id: str):
+    """
+    Returns the sampled stacks of a profile in collapsed format for flamegraph tools.
+
+    :param profile_id: Id from the ``X-Profile-Id`` response header.
+    :type profile_id: str
+    :return: One ``frame;frame;frame count`` line per distinct stack.
+    :rtype: str
+    """
+
+    folded = profile_store.folded(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
@@ -6,6 +6,7 @@ from app.models.user_models import UserModel, UserResponse, TokenModel, RequestE
 from app.auth.auth import Hash, get_user_by_email, create_user, update_token
 from app.auth.email import send_email
 from app.database.db import get_db
+from app.models.db_models import User
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 hash_handler = Hash()
@@ -79,6 +80,16 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Security(security),
+                 current_user: User = Depends(hash_handler.get_current_user), db: Session = Depends(get_db)):
+    await hash_handler.revoke_access_token(credentials.credentials)
+    # get_current_user released its session, so the user is reloaded to drop the refresh token.
+    user = await get_user_by_email(current_user.username, db)
+    await update_token(user, None, db)
+    return {"message": "Logged out"}
+
+
 @router.get('/confirmed_email/{token}')
 async def confirmed_email(token: str, db: Session = Depends(get_db)):
     email = await hash_handler.get_email_from_token(token)
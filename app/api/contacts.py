@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Path, Query, Depends
+from typing import List
+
+from fastapi import APIRouter, Path, Query, Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from fastapi_limiter import FastAPILimiter
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.orm import Session
@@ -6,13 +9,36 @@ from sqlalchemy.orm import Session
 from app.models import contact_model as cm
 from app.models.db_models import User
 from app.database.db import get_db
-from app.crud import contact_crud
+from app.crud import contact_crud, stats_crud, sync_crud
 from app.auth.auth import Hash
+from app.services.change_feed import stream_changes, parse_event_id
+from app.services.coalesce import coalescer
+from app.services.idempotency import idempotency
 
 router = APIRouter(prefix='/api', tags=['contact'])
 hash_handler = Hash()
 
 
+async def idempotent_response(user: User, key: str, body, write) -> Response:
+    """
+    Runs a write through the idempotency store and wraps its stored JSON in a response.
+
+    :param user: The user the key belongs to.
+    :type user: User
+    :param key: The ``Idempotency-Key`` header.
+    :type key: str
+    :param body: The request payload.
+    :type body: BaseModel
+    :param write: Performs the write and returns the response model.
+    :type write: Callable[[], Awaitable[BaseModel]]
+    :return: The original response, marked with ``Idempotent-Replayed`` when it is a replay.
+    :rtype: Response
+    """
+    content, replayed = await idempotency.run(user.id, key, body, write)
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
 @router.post(
     '/contact',
     response_model=cm.ResponseMessageModel,
@@ -21,14 +47,20 @@ hash_handler = Hash()
 )
 async def create_contact(
         contact: cm.PostRequestModel,
+        idempotency_key: str | None = Header(None, description="Makes retries of this request safe"),
         current_user: User = Depends(hash_handler.get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     Creates a new contact entry for the current user.
 
+    With an ``Idempotency-Key`` header, retries of the same request replay the first
+    response instead of adding the contact again.
+
     :param contact: Contact information to be saved.
     :type contact: cm.PostRequestModel
+    :param idempotency_key: Client-chosen key identifying this request across retries.
+    :type idempotency_key: str | None
     :param current_user: The currently authenticated user.
     :type current_user: User
     :param db: The database session.
@@ -37,8 +69,13 @@ async def create_contact(
     :rtype: cm.ResponseMessageModel
     """
 
-    await contact_crud.create_contact_crud(body=contact, user=current_user, db=db)
-    return cm.ResponseMessageModel(message="Contact is added")
+    async def create():
+        await contact_crud.create_contact_crud(body=contact, user=current_user, db=db)
+        return cm.ResponseMessageModel(message="Contact is added")
+
+    if idempotency_key is None:
+        return await create()
+    return await idempotent_response(current_user, idempotency_key, contact, create)
 
 
 @router.get(
@@ -50,16 +87,22 @@ async def create_contact(
 async def get_all_contacts(
         skip: int = 0,
         limit: int = 10,
+        fields: str | None = Query(None, description="Comma-separated contact fields to return"),
         current_user: User = Depends(hash_handler.get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     Retrieves a paginated list of contacts for the current user.
 
+    Identical concurrent requests share one query and one serialized response. With
+    ``fields``, only those columns are read and returned.
+
     :param skip: Number of contacts to skip.
     :type skip: int
     :param limit: Maximum number of contacts to return.
     :type limit: int
+    :param fields: Comma-separated contact fields; ``id`` is always included.
+    :type fields: str | None
     :param current_user: The currently authenticated user.
     :type current_user: User
     :param db: The database session.
@@ -68,7 +111,255 @@ async def get_all_contacts(
     :rtype: cm.GetAllResponseModel
     """
 
-    return await contact_crud.get_contacts_crud(skip=skip, limit=limit, user=current_user, db=db)
+    selected = contact_crud.parse_contact_fields(fields)
+    body = await coalescer.do(
+        f"contacts:{current_user.id}:{skip}:{limit}:{','.join(selected or ())}",
+        lambda: contact_crud.get_contacts_crud(skip=skip, limit=limit, user=current_user, db=db, fields=selected)
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    '/contacts/stats',
+    response_model=cm.ContactStatsModel,
+    description="No more than 10 requests per minute",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_contact_stats(
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Returns contact counts per email domain, birth month and week added.
+
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: The current user's contact statistics.
+    :rtype: cm.ContactStatsModel
+    """
+
+    return await stats_crud.get_stats_crud(user=current_user, db=db)
+
+
+@router.get(
+    '/contacts/changes',
+    response_model=cm.ChangesResponseModel,
+    description="No more than 10 requests per minute",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_contact_changes(
+        since: str | None = Query(None, description="next_token from the previous sync"),
+        limit: int = Query(500, ge=1, le=1000),
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Returns contacts created, updated or deleted since the last sync.
+
+    :param since: Token returned by the previous call; omit for a full sync.
+    :type since: str, optional
+    :param limit: Maximum number of contacts and of deletions to return.
+    :type limit: int
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Changed contacts, deleted ids and the token for the next call.
+    :rtype: cm.ChangesResponseModel
+    """
+
+    return await sync_crud.get_changes_crud(since=since, limit=limit, user=current_user, db=db)
+
+
+@router.get(
+    '/contacts/stream',
+    response_class=StreamingResponse,
+    description="Server-Sent Events stream of contact changes"
+)
+async def stream_contact_changes(
+        last_event_id: str | None = Header(None, description="Id of the last event received, to resume"),
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Streams the current user's contact changes as Server-Sent Events.
+
+    :param last_event_id: The ``Last-Event-ID`` header sent by reconnecting clients.
+    :type last_event_id: str, optional
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: An ``text/event-stream`` response.
+    :rtype: StreamingResponse
+    """
+
+    if last_event_id:
+        try:
+            parse_event_id(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    # The stream can stay open for hours; give the connection back to the pool now.
+    db.close()
+    return StreamingResponse(
+        stream_changes(current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    '/contacts/by-phone',
+    response_model=List[cm.DBModel],
+    description="No more than 10 requests per minute",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_contacts_by_phone(
+        phone: str = Query(..., description="Phone number in any common notation"),
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Looks up the current user's contacts that own a phone number.
+
+    :param phone: The phone number to look up.
+    :type phone: str
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Contacts with that phone number.
+    :rtype: List[cm.DBModel]
+    """
+
+    return await contact_crud.get_contacts_by_phone_crud(phone_number=phone, user=current_user, db=db)
+
+
+@router.get(
+    '/contacts/export',
+    response_class=StreamingResponse,
+    description="No more than 5 requests per minute",
+    dependencies=[Depends(RateLimiter(times=5, seconds=60))]
+)
+async def export_contacts(
+        fields: str | None = Query(None, description="Comma-separated contact fields to return"),
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Downloads all of the current user's contacts as CSV.
+
+    :param fields: Comma-separated columns to export; ``id`` is always included.
+    :type fields: str | None
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: A streamed CSV file.
+    :rtype: StreamingResponse
+    """
+
+    selected = contact_crud.parse_contact_fields(fields)
+    return StreamingResponse(
+        contact_crud.export_contacts_crud(user=current_user, db=db, fields=selected),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="contacts.csv"'}
+    )
+
+
+@router.get(
+    '/contacts/autocomplete',
+    response_model=List[cm.AutocompleteItemModel],
+    description="No more than 120 requests per minute",
+    dependencies=[Depends(RateLimiter(times=120, seconds=60))]
+)
+async def autocomplete_contacts(
+        q: str = Query(..., min_length=1, max_length=50, description="Prefix of a name or email"),
+        limit: int = Query(10, ge=1, le=50),
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Suggests contacts as the user types, matching name and email prefixes.
+
+    :param q: The typed prefix.
+    :type q: str
+    :param limit: Maximum number of suggestions.
+    :type limit: int
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Matching contacts.
+    :rtype: List[cm.AutocompleteItemModel]
+    """
+
+    return await contact_crud.autocomplete_contacts_crud(q=q, limit=limit, user=current_user, db=db)
+
+
+@router.get(
+    '/contacts/duplicates',
+    response_model=cm.DuplicatesResponseModel,
+    description="No more than 10 requests per minute",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_duplicate_contacts(
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Finds groups of contacts that share a normalized email or phone number.
+
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Groups of candidate duplicates.
+    :rtype: cm.DuplicatesResponseModel
+    """
+
+    return await contact_crud.find_duplicates_crud(user=current_user, db=db)
+
+
+@router.post(
+    '/contacts/merge',
+    response_model=cm.ResponseMessageModel,
+    description="No more than 10 requests per minute",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def merge_contacts(
+        body: cm.MergeRequestModel,
+        idempotency_key: str | None = Header(None, description="Makes retries of this request safe"),
+        current_user: User = Depends(hash_handler.get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Merges duplicate contacts into a primary contact.
+
+    With an ``Idempotency-Key`` header, retries of the same request replay the first
+    response instead of merging again.
+
+    :param body: The primary contact and the duplicates to merge into it.
+    :type body: cm.MergeRequestModel
+    :param idempotency_key: Client-chosen key identifying this request across retries.
+    :type idempotency_key: str | None
+    :param current_user: The currently authenticated user.
+    :type current_user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Confirmation message.
+    :rtype: cm.ResponseMessageModel
+    """
+
+    async def merge():
+        await contact_crud.merge_contacts_crud(body=body, user=current_user, db=db)
+        return cm.ResponseMessageModel(message="Contacts success merged")
+
+    if idempotency_key is None:
+        return await merge()
+    return await idempotent_response(current_user, idempotency_key, body, merge)
 
 
 @router.get(
@@ -79,14 +370,19 @@ async def get_all_contacts(
 )
 async def get_contact(
         contact_id: int = Path(),
+        fields: str | None = Query(None, description="Comma-separated contact fields to return"),
         current_user: User = Depends(hash_handler.get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     Retrieves a single contact by ID for the current user.
 
+    Identical concurrent requests share one query and one serialized response.
+
     :param contact_id: The ID of the contact to retrieve.
     :type contact_id: int
+    :param fields: Comma-separated contact fields; ``id`` is always included.
+    :type fields: str | None
     :param current_user: The currently authenticated user.
     :type current_user: User
     :param db: The database session.
@@ -95,7 +391,12 @@ async def get_contact(
     :rtype: cm.DBModel
     """
 
-    return await contact_crud.get_contact_crud(contact_id=contact_id, user=current_user, db=db)
+    selected = contact_crud.parse_contact_fields(fields)
+    body = await coalescer.do(
+        f"contact:{current_user.id}:{contact_id}:{','.join(selected or ())}",
+        lambda: contact_crud.get_contact_crud(contact_id=contact_id, user=current_user, db=db, fields=selected)
+    )
+    return Response(content=body, media_type="application/json")
 
 
 @router.put(
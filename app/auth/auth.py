@@ -1,7 +1,9 @@
+import logging
+import uuid
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
-import redis.asyncio as redis
 from fastapi import Depends, HTTPException
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
@@ -9,19 +11,35 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from starlette import status
 
+from app.auth.revocation import revocations
+from app.conf.log_config import set_log_user
 from app.database.db import get_db
 from app.models.db_models import User
 from app.models.user_models import UserModel
-from app.conf.config import settings
+from app.conf.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_pwd_context() -> CryptContext:
+    return CryptContext(schemes=['bcrypt'], deprecated="auto")
 
-class Hash:
-    pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
-    SECRET_KEY = settings.secret_key
-    ALGORITHM = settings.algorithm
 
+class Hash:
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-    r = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+
+    @property
+    def pwd_context(self) -> CryptContext:
+        return get_pwd_context()
+
+    @property
+    def SECRET_KEY(self) -> str:
+        return get_settings().secret_key
+
+    @property
+    def ALGORITHM(self) -> str:
+        return get_settings().algorithm
 
     def verify_password(self, plain_password, hashed_password):
         return self.pwd_context.verify(plain_password, hashed_password)
@@ -36,7 +54,7 @@ class Hash:
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
 
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token"})
+        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token", "jti": uuid.uuid4().hex})
         encoded_access_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_access_token
 
@@ -80,12 +98,36 @@ class Hash:
                 raise credentials_exception
         except JWTError as e:
             raise credentials_exception
+        if await revocations.is_revoked(payload.get("jti")):
+            raise credentials_exception
 
         user: User = db.query(User).filter(User.username == email).first()
+        # Return the connection to the pool while the handler runs; the loaded user stays readable.
+        db.close()
         if user is None:
             raise credentials_exception
+        set_log_user(user.id)
         return user
 
+    async def revoke_access_token(self, token: str) -> None:
+        """
+        Revokes an access token for the rest of its lifetime.
+
+        :param token: The encoded access token.
+        :type token: str
+        :raises HTTPException: If the token is invalid or not an access token.
+        """
+        try:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail="Could not validate credentials")
+        if payload.get('scope') != 'access_token':
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail="Invalid scope for token")
+        if payload.get('jti') is not None:
+            await revocations.revoke(payload['jti'], payload['exp'])
+
     def create_email_token(self, data: dict):
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(days=7)
@@ -99,7 +141,7 @@ class Hash:
             email = payload["sub"]
             return email
         except JWTError as e:
-            print(e)
+            logger.info("Rejected email verification token: %s", e)
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                                 detail="Invalid token for email verification")
 
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+from redis.exceptions import RedisError
+
+from app.conf.config import get_settings
+from app.database.redis_db import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "auth:revoked:"
+CHANNEL = "auth:revocations"
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership with no false negatives and a tunable false positive rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Tracks revoked access tokens by ``jti``.
+
+    Revocations are stored in Redis with the token's remaining lifetime as TTL and
+    announced over pub/sub. Each worker mirrors them into a Bloom filter, so checking a
+    token that was not revoked is a local bit test; Redis is asked only when the filter
+    reports a hit, to rule out false positives. Until the filter has been loaded, and
+    whenever the subscription is down, every check goes to Redis. The filter is rebuilt
+    from Redis every ``revocation_rebuild_interval`` seconds to shed expired entries.
+    """
+
+    def __init__(self):
+        self.filter: BloomFilter | None = None
+        self.synced = False
+        self._task: asyncio.Task | None = None
+        self.stats = {"local": 0, "redis": 0}
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revokes a token until it would have expired anyway.
+
+        :param jti: The token id.
+        :type jti: str
+        :param expires_at: The token's ``exp`` as a UNIX timestamp.
+        :type expires_at: float
+        """
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return
+        r = get_redis()
+        await r.set(f"{KEY_PREFIX}{jti}", 1, ex=ttl)
+        await r.publish(CHANNEL, jti)
+        if self.filter is not None:
+            self.filter.add(jti)
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        """
+        Checks whether a token was revoked.
+
+        :param jti: The token id; tokens without one cannot be revoked.
+        :type jti: str | None
+        :return: ``True`` if the token was revoked, or if Redis cannot confirm it was not.
+        :rtype: bool
+        """
+        if jti is None:
+            return False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if self.synced and jti not in self.filter:
+            self.stats["local"] += 1
+            return False
+        self.stats["redis"] += 1
+        try:
+            return bool(await get_redis().exists(f"{KEY_PREFIX}{jti}"))
+        except RedisError as e:
+            logger.warning("Could not check token revocation, rejecting token: %s", e)
+            return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.synced = False
+
+    async def _load(self) -> BloomFilter:
+        settings = get_settings()
+        bloom = BloomFilter(settings.revocation_filter_capacity, settings.revocation_filter_error_rate)
+        async for key in get_redis().scan_iter(match=f"{KEY_PREFIX}*", count=1000):
+            bloom.add(key[len(KEY_PREFIX):])
+        return bloom
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                # Subscribe before loading so nothing revoked in between is missed.
+                await pubsub.subscribe(CHANNEL)
+                self.filter = await self._load()
+                self.synced = True
+                rebuild_at = time.monotonic() + get_settings().revocation_rebuild_interval
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        self.filter.add(message["data"])
+                    if time.monotonic() >= rebuild_at:
+                        fresh = await self._load()
+                        # Re-add anything announced while the rebuild was scanning.
+                        while (message := await pubsub.get_message(ignore_subscribe_messages=True)) is not None:
+                            if message["type"] == "message":
+                                fresh.add(message["data"])
+                        self.filter = fresh
+                        rebuild_at = time.monotonic() + get_settings().revocation_rebuild_interval
+            except RedisError as e:
+                self.synced = False
+                logger.warning("Token revocation subscription lost: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                self.synced = False
+                await pubsub.aclose()
+
+
+revocations = RevocationList()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 
 
@@ -16,10 +18,67 @@ class Settings(BaseSettings):
     mail_server: str
     redis_host: str = 'localhost'
     redis_port: int = 6379
+    db_prewarm_connections: int = 2
+    default_phone_country_code: str = '380'
+    counter_reconcile_interval: int = 3600
+    change_feed_backlog: int = 1000
+    change_feed_keepalive: int = 15
+    sync_settle_seconds: int = 5
+    tombstone_retention_days: int = 30
+    tombstone_compaction_interval: int = 86400
+    coalesce_remote: bool = False
+    coalesce_lock_ms: int = 2000
+    coalesce_result_ttl_ms: int = 100
+    profiling_enabled: bool = False
+    profile_allowed_ips: list[str] = ["127.0.0.1"]
+    profile_interval_ms: float = 1.0
+    profile_dir: str = "/tmp/contact-profiles"
+    profile_keep: int = 100
+    log_level: str = "INFO"
+    log_queue_size: int = 10000
+    log_success_sample_rate: float = 1.0
+    log_slow_request_ms: float = 500.0
+    load_shed_enabled: bool = True
+    load_shed_initial_limit: int = 32
+    load_shed_min_limit: int = 4
+    load_shed_max_limit: int = 256
+    load_shed_queue_size: int = 128
+    load_shed_queue_timeout_ms: int = 1000
+    load_shed_target_latency_ms: int = 250
+    load_shed_retry_after: int = 1
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lock_ms: int = 10000
+    revocation_filter_capacity: int = 100000
+    revocation_filter_error_rate: float = 0.01
+    revocation_rebuild_interval: int = 900
+    autocomplete_cache_bytes: int = 67108864
+    autocomplete_ttl: int = 300
+    compression_enabled: bool = True
+    compression_encodings: list[str] = ["zstd", "br", "gzip"]
+    compression_minimum_size: int = 1024
+    compression_threadpool_size: int = 65536
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Loads the application settings on first use and caches them.
+
+    :return: The application settings.
+    :rtype: Settings
+    """
+    return Settings()
+
+
+def __getattr__(name: str):
+    # Keeps ``from app.conf.config import settings`` working without reading .env at import.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,187 @@
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from sqlalchemy import event
+
+from app.conf.config import get_settings
+from app.database.db import get_engine
+
+ACCESS_LOGGER = "app.access"
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+@dataclass
+class RequestLogContext:
+    request_id: str
+    user_id: int | None = None
+    db_ms: float = 0.0
+    db_queries: int = 0
+
+
+_request_context: ContextVar[RequestLogContext | None] = ContextVar("request_log_context", default=None)
+
+
+def start_request_context(request_id: str):
+    """
+    Starts collecting log fields for the current request.
+
+    :param request_id: Id echoed in every record logged while handling the request.
+    :type request_id: str
+    :return: Token for :func:`end_request_context`.
+    """
+    return _request_context.set(RequestLogContext(request_id=request_id))
+
+
+def end_request_context(token) -> None:
+    _request_context.reset(token)
+
+
+def current_request_context() -> RequestLogContext | None:
+    return _request_context.get()
+
+
+def set_log_user(user_id: int) -> None:
+    """
+    Attaches the authenticated user to the logs of the current request.
+
+    :param user_id: Id of the user making the request.
+    :type user_id: int
+    """
+    context = _request_context.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("log_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_stack = conn.info.get("log_started")
+    if not started_stack:
+        return
+    started = started_stack.pop()
+    request = _request_context.get()
+    if request is not None:
+        request.db_ms += (time.perf_counter() - started) * 1000
+        request.db_queries += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Renders a record as one JSON object per line, including any ``extra=`` fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RESERVED)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Copies request id and user id onto the record while still on the request's context.
+
+    The listener thread that formats the record does not see the request's contextvars.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request_context.get()
+        if context is not None:
+            record.request_id = context.request_id
+            if context.user_id is not None:
+                record.user_id = context.user_id
+        return True
+
+
+class SuccessSampler(logging.Filter):
+    """
+    Keeps only ``rate`` of the access records for fast, successful requests.
+
+    Client and server errors, slow requests and anything logged at WARNING or above
+    are always kept.
+    """
+
+    def __init__(self, rate: float, slow_ms: float):
+        super().__init__()
+        self.rate = rate
+        self.slow_ms = slow_ms
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno >= logging.WARNING or record.name != ACCESS_LOGGER:
+            return True
+        if getattr(record, "status_code", 0) >= 400 or getattr(record, "latency_ms", 0) >= self.slow_ms:
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them on the event loop.
+
+    The queue is bounded; when it is full the record is dropped and counted rather
+    than blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens in the listener; the queue never leaves the process.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging() -> QueueListener:
+    """
+    Routes all logging through a queue to a JSON handler on a background thread.
+
+    Also registers the SQLAlchemy listeners that add DB time to the request log context.
+
+    :return: The started listener; stop it on shutdown to flush queued records.
+    :rtype: QueueListener
+    """
+    settings = get_settings()
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SuccessSampler(settings.log_success_sample_rate, settings.log_slow_request_ms))
+    queue_handler.addFilter(RequestContextFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.log_level)
+
+    engine = get_engine()
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    listener.start()
+    return listener
@@ -1,18 +1,113 @@
-from datetime import datetime
+import csv
+import io
+from typing import AsyncIterator, List
 
-from sqlalchemy import and_, or_
+from sqlalchemy import Select, and_, or_, delete, func, insert, select, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
 
-from app.models.db_models import Contact, User
-from app.models.contact_model import GetAllResponseModel, PostRequestModel, DBModel, PutRequestModel
+from app.conf.config import get_settings
+from app.database.db import releases_connection
+from app.crud.counter_crud import contact_count_change, get_contact_count
+from app.crud.normalize import normalize_email, to_e164
+from app.crud.stats_crud import contact_stats_change, stats_deltas
+from app.models.db_models import Contact, ContactTombstone, User
+from app.services.autocomplete import PrefixIndex, autocomplete_cache
+from app.services.change_feed import publish_change
+from app.models.contact_model import (GetAllResponseModel, PostRequestModel, DBModel, PutRequestModel,
+                                      DuplicateGroupModel, DuplicatesResponseModel, MergeRequestModel,
+                                      AutocompleteItemModel, CONTACT_FIELDS, partial_contact_model,
+                                      partial_page_model)
 
 
+def parse_contact_fields(fields: str | None) -> tuple[str, ...] | None:
+    """
+    Parses a ``fields=`` parameter into contact field names.
+
+    The result is in ``CONTACT_FIELDS`` order and always includes ``id``, so equal
+    selections compare equal however the client ordered them.
+
+    :param fields: Comma-separated field names, or ``None`` for every field.
+    :type fields: str | None
+    :return: The selected fields, or ``None`` when all are wanted.
+    :rtype: tuple[str, ...] | None
+    :raises HTTPException: If a field name is unknown.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(CONTACT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=422,
+                            detail=f"Unknown contact fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in CONTACT_FIELDS if name in requested)
+
+
+def _delete_contacts_stmt(criteria) -> Select:
+    """
+    Builds one statement that deletes contacts, logs tombstones for delta sync and
+    decrements the owners' counters and statistics.
+
+    :param criteria: WHERE clause selecting the contacts to delete.
+    :return: A SELECT over the deleted contact ids.
+    :rtype: Select
+    """
+    removed = delete(Contact).where(criteria).returning(
+        Contact.id, Contact.user_id, Contact.email_key, Contact.birthday, Contact.created_at
+    ).cte('removed')
+    tombstones = insert(ContactTombstone).from_select(
+        [ContactTombstone.contact_id, ContactTombstone.user_id], select(removed.c.id, removed.c.user_id)
+    )
+    stats = contact_stats_change(stats_deltas(
+        removed, -1, email_domain=removed.c.email_key, birth_month=removed.c.birthday,
+        added_week=removed.c.created_at
+    ))
+    return select(removed.c.id).add_cte(contact_count_change(removed, -1).cte('counted'),
+                                        tombstones.cte('tombstoned'), stats.cte('stats'))
+
+
+def _update_with_stats_stmt(contact_id: int, user_id: int, values: dict) -> Select:
+    """
+    Builds one statement that updates a contact and moves it between statistics buckets.
+
+    The previous email and birthday are read with ``FOR UPDATE`` in the same statement,
+    so the old buckets are decremented and the new ones incremented atomically.
+
+    :param contact_id: The contact to update.
+    :param user_id: The owner of the contact.
+    :param values: Column values to set.
+    :return: A SELECT over the updated contact id.
+    :rtype: Select
+    """
+    old = select(Contact.id, Contact.user_id, Contact.email_key, Contact.birthday).where(
+        and_(Contact.id == contact_id, Contact.user_id == user_id)
+    ).with_for_update().subquery('old')
+    updated = (
+        update(Contact)
+        # The literal user_id lets the planner prune to one partition; the join alone cannot.
+        .where(and_(Contact.id == contact_id, Contact.user_id == user_id,
+                    Contact.id == old.c.id, Contact.user_id == old.c.user_id))
+        .values(**values)
+        .returning(Contact.id, Contact.user_id, Contact.email_key, Contact.birthday,
+                   old.c.email_key.label('old_email_key'), old.c.birthday.label('old_birthday'))
+        .cte('updated')
+    )
+    stats = contact_stats_change(
+        stats_deltas(updated, -1, email_domain=updated.c.old_email_key, birth_month=updated.c.old_birthday)
+        + stats_deltas(updated, 1, email_domain=updated.c.email_key, birth_month=updated.c.birthday)
+    )
+    return select(updated.c.id).add_cte(stats.cte('stats'))
+
+
+@releases_connection
 async def create_contact_crud(body: PostRequestModel, user: User, db: Session) -> None:
     """
     Creates a new contact in the database for the given user.
 
+    The insert and the contact counter and statistics updates are sent as one statement.
+
     :param body: Contact data to be stored.
     :type body: PostRequestModel
     :param user: The user who owns the contact.
@@ -22,26 +117,40 @@ async def create_contact_crud(body: PostRequestModel, user: User, db: Session) -
     :raises HTTPException: If an error occurs during creation.
     """
     try:
-        contact = Contact(
+        created = insert(Contact).values(
             first_name=body.first_name,
             last_name=body.last_name,
             email=body.email,
             phone_number=body.phone_number,
             birthday=body.birthday,
+            email_key=normalize_email(body.email),
+            phone_e164=to_e164(body.phone_number, get_settings().default_phone_country_code),
             user_id=user.id
-        )
-        db.add(contact)
+        ).returning(Contact.id, Contact.user_id, Contact.email_key, Contact.birthday, Contact.created_at).cte('created')
+        stats = contact_stats_change(stats_deltas(
+            created, 1, email_domain=created.c.email_key, birth_month=created.c.birthday,
+            added_week=created.c.created_at
+        ))
+        contact_id = db.execute(
+            select(created.c.id).add_cte(contact_count_change(created, 1).cte('counted'), stats.cte('stats'))
+        ).scalar_one()
         db.commit()
-        db.refresh(contact)
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500,
                             detail=f"Problem with create contact. {e}")
+    await publish_change(user.id, "created", contact_id)
 
 
-async def get_contacts_crud(skip: int, limit: int, user: User, db: Session) -> GetAllResponseModel:
+@releases_connection
+async def get_contacts_crud(skip: int, limit: int, user: User, db: Session,
+                            fields: tuple[str, ...] | None = None) -> GetAllResponseModel:
     """
     Retrieves a paginated list of contacts for the given user.
 
+    With ``fields``, only those columns are selected and the rows are returned as
+    partial contacts without loading ORM entities.
+
     :param skip: Number of records to skip.
     :type skip: int
     :param limit: Maximum number of records to return.
@@ -50,18 +159,33 @@ async def get_contacts_crud(skip: int, limit: int, user: User, db: Session) -> G
     :type user: User
     :param db: The database session.
     :type db: Session
-    :return: List of contacts and pagination metadata.
+    :param fields: Contact fields to return, from :func:`parse_contact_fields`.
+    :type fields: tuple[str, ...] | None
+    :return: List of contacts and pagination metadata, including the total from the maintained counter.
     :rtype: GetAllResponseModel
     """
-    contacts = db.query(Contact).filter(Contact.user_id == user.id).offset(skip).limit(limit).all()
+    if fields is not None:
+        rows = db.query(*(getattr(Contact, name) for name in fields)).filter(
+            Contact.user_id == user.id).order_by(Contact.id).offset(skip).limit(limit).all()
+        model = partial_contact_model(fields)
+        return partial_page_model(fields).model_construct(
+            contacts=[model.model_construct(**dict(zip(fields, row))) for row in rows],
+            skip=skip,
+            limit=limit,
+            total=await get_contact_count(user.id, db)
+        )
+    contacts = db.query(Contact).filter(Contact.user_id == user.id).order_by(Contact.id).offset(skip).limit(limit).all()
     return GetAllResponseModel(
         contacts=[DBModel.from_orm(c) for c in contacts],
         skip=skip,
-        limit=limit
+        limit=limit,
+        total=await get_contact_count(user.id, db)
 )
 
 
-async def get_contact_crud(contact_id: int, user: User, db: Session) -> DBModel:
+@releases_connection
+async def get_contact_crud(contact_id: int, user: User, db: Session,
+                           fields: tuple[str, ...] | None = None) -> DBModel:
     """
     Retrieves a specific contact by ID for the given user.
 
@@ -71,10 +195,20 @@ async def get_contact_crud(contact_id: int, user: User, db: Session) -> DBModel:
     :type user: User
     :param db: The database session.
     :type db: Session
-    :return: The contact as a database model.
+    :param fields: Contact fields to return, from :func:`parse_contact_fields`.
+    :type fields: tuple[str, ...] | None
+    :return: The contact as a database model, or a partial one when ``fields`` is given.
     :rtype: DBModel
     :raises HTTPException: If the contact does not exist.
     """
+    if fields is not None:
+        row = db.query(*(getattr(Contact, name) for name in fields)).filter(
+            and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
+        if row is None:
+            raise HTTPException(status_code=404,
+                                detail="Contact not found")
+        return partial_contact_model(fields).model_construct(**dict(zip(fields, row)))
+
     contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
     if contact is None:
         raise HTTPException(status_code=404,
@@ -83,10 +217,16 @@ async def get_contact_crud(contact_id: int, user: User, db: Session) -> DBModel:
     return DBModel.from_orm(contact)
 
 
+@releases_connection
 async def update_contact_crud(body: PutRequestModel, contact_id: int, user: User, db: Session) -> None:
     """
     Updates an existing contact for the given user.
 
+    Only the fields present in the request are changed. The update is a single
+    ``UPDATE ... RETURNING`` statement, which also moves the contact between
+    statistics buckets when its email or birthday changes. A missing contact is
+    detected from the returned rows instead of a prior ``SELECT``.
+
     :param body: New data for the contact.
     :type body: PutRequestModel
     :param contact_id: The ID of the contact to update.
@@ -97,24 +237,37 @@ async def update_contact_crud(body: PutRequestModel, contact_id: int, user: User
     :type db: Session
     :raises HTTPException: If the contact does not exist.
     """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
-    if contact:
-        contact.first_name = body.first_name
-        contact.last_name = body.last_name
-        contact.email = body.email
-        contact.phone_number = body.phone_number
-        contact.birthday = body.birthday
-        contact.updated_at = datetime.now()
-        db.commit()
-    else:
+    values = body.model_dump(exclude_none=True)
+    if "email" in values:
+        values["email_key"] = normalize_email(values["email"])
+    if "phone_number" in values:
+        values["phone_e164"] = to_e164(values["phone_number"], get_settings().default_phone_country_code)
+    values["updated_at"] = func.now()
+
+    stmt = (
+        update(Contact)
+        .where(and_(Contact.id == contact_id, Contact.user_id == user.id))
+        .values(**values)
+        .returning(Contact.id)
+    )
+    if "email" in values or "birthday" in values:
+        stmt = _update_with_stats_stmt(contact_id, user.id, values)
+    if db.execute(stmt).first() is None:
+        db.rollback()
         raise HTTPException(status_code=404,
                             detail="Contact not found")
+    db.commit()
+    await publish_change(user.id, "updated", contact_id)
 
 
+@releases_connection
 async def remove_contact_crud(contact_id: int, user: User, db: Session) -> None:
     """
     Deletes a contact by ID for the given user.
 
+    The delete, its tombstone and the contact counter update are sent as one
+    statement, and a missing contact is detected from the returned rows.
+
     :param contact_id: The ID of the contact to delete.
     :type contact_id: int
     :param user: The user who owns the contact.
@@ -123,15 +276,252 @@ async def remove_contact_crud(contact_id: int, user: User, db: Session) -> None:
     :type db: Session
     :raises HTTPException: If the contact does not exist.
     """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
-    if contact:
-        db.delete(contact)
-        db.commit()
-    else:
+    stmt = _delete_contacts_stmt(and_(Contact.id == contact_id, Contact.user_id == user.id))
+    if db.execute(stmt).first() is None:
+        db.rollback()
         raise HTTPException(status_code=404,
                             detail="Contact not found")
+    db.commit()
+    await publish_change(user.id, "deleted", contact_id)
+
+
+@releases_connection
+async def get_contacts_by_phone_crud(phone_number: str, user: User, db: Session) -> List[DBModel]:
+    """
+    Finds the user's contacts with the given phone number.
+
+    The number is normalized to E.164 and matched exactly against the indexed
+    ``phone_e164`` column, so the lookup is an index seek rather than a scan.
+
+    :param phone_number: Phone number in any common notation.
+    :type phone_number: str
+    :param user: The user whose contacts are searched.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Contacts with that number.
+    :rtype: List[DBModel]
+    :raises HTTPException: If the number cannot be normalized.
+    """
+    phone_e164 = to_e164(phone_number, get_settings().default_phone_country_code)
+    if phone_e164 is None:
+        raise HTTPException(status_code=422,
+                            detail="Invalid phone number")
+
+    contacts = db.query(Contact).filter(and_(Contact.user_id == user.id, Contact.phone_e164 == phone_e164)).all()
+    return [DBModel.from_orm(c) for c in contacts]
+
+
+async def export_contacts_crud(user: User, db: Session, fields: tuple[str, ...] | None = None,
+                               batch_size: int = 1000) -> AsyncIterator[str]:
+    """
+    Streams all of the user's contacts as CSV, one batch of rows per chunk.
+
+    Batches are read by keyset on the (user_id, id) index with column-only selects, and
+    the connection is returned to the pool between batches while the client downloads.
+
+    :param user: The user whose contacts are exported.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :param fields: Columns to export, from :func:`parse_contact_fields`; all when ``None``.
+    :type fields: tuple[str, ...] | None
+    :param batch_size: Rows read per query.
+    :type batch_size: int
+    :return: CSV text: a header line, then the contacts ordered by id.
+    :rtype: AsyncIterator[str]
+    """
+    fields = fields or CONTACT_FIELDS
+    columns = [getattr(Contact, name) for name in fields]
+    id_position = fields.index("id")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(*columns).filter(and_(Contact.user_id == user.id, Contact.id > last_id)).order_by(
+                Contact.id).limit(batch_size).all()
+            db.close()
+            writer.writerows(rows)
+            chunk = buffer.getvalue()
+            if chunk:
+                yield chunk
+            buffer.seek(0)
+            buffer.truncate()
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][id_position]
+    finally:
+        db.close()
+
+
+@releases_connection
+async def autocomplete_contacts_crud(q: str, limit: int, user: User, db: Session) -> List[AutocompleteItemModel]:
+    """
+    Suggests the user's contacts whose first name, last name, full name or email starts with ``q``.
+
+    Served from the user's cached prefix index; the database is read only to build the
+    index when the user has none cached.
+
+    :param q: The typed prefix; case-insensitive.
+    :type q: str
+    :param limit: Maximum number of suggestions.
+    :type limit: int
+    :param user: The user whose contacts are searched.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Matching contacts, ordered by the matched term.
+    :rtype: List[AutocompleteItemModel]
+    """
+    prefix = q.strip().lower()
+    if not prefix:
+        return []
+    index = autocomplete_cache.get(user.id)
+    if index is None:
+        autocomplete_cache.begin_build(user.id)
+        try:
+            rows = db.query(Contact.id, Contact.first_name, Contact.last_name, Contact.email).filter(
+                Contact.user_id == user.id).all()
+            index = PrefixIndex(rows)
+        except BaseException:
+            autocomplete_cache.abort_build(user.id)
+            raise
+        autocomplete_cache.put(user.id, index)
+    return [AutocompleteItemModel(id=contact_id, first_name=first_name, last_name=last_name, email=email)
+            for contact_id, first_name, last_name, email in index.search(prefix, limit)]
+
+
+def _duplicate_roots(rows) -> dict[int, int]:
+    # Union-find over (id, email_key, phone_e164) rows; maps every contact id to its group's root.
+    parent: dict[int, int] = {}
+
+    def find(contact_id: int) -> int:
+        root = contact_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[contact_id] != root:
+            parent[contact_id], contact_id = root, parent[contact_id]
+        return root
+
+    buckets: dict[tuple[str, str], int] = {}
+    for contact_id, email_key, phone_e164 in rows:
+        parent[contact_id] = contact_id
+        for key in (("email", email_key), ("phone", phone_e164)):
+            if key[1] is None:
+                continue
+            first_id = buckets.setdefault(key, contact_id)
+            if first_id != contact_id:
+                parent[find(contact_id)] = find(first_id)
+    return {contact_id: find(contact_id) for contact_id in parent}
+
+
+def _fill_from_duplicates(primary: Contact, duplicates: List[Contact]) -> None:
+    # Email and birthday are required, so only blank names and an unusable phone number can be filled.
+    for duplicate in duplicates:
+        for field in ("first_name", "last_name"):
+            if not getattr(primary, field).strip() and getattr(duplicate, field).strip():
+                setattr(primary, field, getattr(duplicate, field))
+        if primary.phone_e164 is None and (duplicate.phone_e164 is not None or not primary.phone_number.strip()):
+            primary.phone_number, primary.phone_e164 = duplicate.phone_number, duplicate.phone_e164
+
+
+@releases_connection
+async def find_duplicates_crud(user: User, db: Session) -> DuplicatesResponseModel:
+    """
+    Groups the user's contacts that share a normalized email or phone number.
+
+    Only the key columns are loaded and bucketed by key in a single pass, so the cost is
+    linear in the number of contacts. Groups are transitive: A and C end up together
+    when A shares an email with B and B shares a phone number with C.
+
+    :param user: The user whose contacts are checked.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Groups of two or more candidate duplicates.
+    :rtype: DuplicatesResponseModel
+    """
+    rows = db.query(Contact.id, Contact.email_key, Contact.phone_e164).filter(Contact.user_id == user.id).all()
+    groups: dict[int, list[int]] = {}
+    for contact_id, root in _duplicate_roots(rows).items():
+        groups.setdefault(root, []).append(contact_id)
+    duplicate_groups = [ids for ids in groups.values() if len(ids) > 1]
+    if not duplicate_groups:
+        return DuplicatesResponseModel(groups=[])
+
+    duplicate_ids = [contact_id for ids in duplicate_groups for contact_id in ids]
+    contacts = db.query(Contact).filter(and_(Contact.user_id == user.id, Contact.id.in_(duplicate_ids))).all()
+    by_id = {contact.id: DBModel.from_orm(contact) for contact in contacts}
+    return DuplicatesResponseModel(groups=[
+        DuplicateGroupModel(contacts=[by_id[contact_id] for contact_id in sorted(ids) if contact_id in by_id])
+        for ids in duplicate_groups
+    ])
+
+
+@releases_connection
+async def merge_contacts_crud(body: MergeRequestModel, user: User, db: Session) -> None:
+    """
+    Merges duplicate contacts into a primary contact in one transaction.
+
+    The primary contact is kept and the duplicates are deleted. Every duplicate must be
+    in the primary's group as reported by :func:`find_duplicates_crud`, so merging cannot
+    be used to delete unrelated contacts. Blank names and a phone number that could not
+    be normalized are filled on the primary from the duplicates, in the order given.
+    Nothing is changed unless every listed contact belongs to the user.
+
+    :param body: The primary contact and the duplicates to fold into it.
+    :type body: MergeRequestModel
+    :param user: The user who owns the contacts.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :raises HTTPException: If the request is inconsistent, a contact does not exist or a
+        listed contact is not a duplicate of the primary one.
+    """
+    duplicate_ids = list(dict.fromkeys(body.duplicate_ids))
+    if body.primary_id in duplicate_ids:
+        raise HTTPException(status_code=400,
+                            detail="Primary contact cannot be merged into itself")
+
+    try:
+        # Lock the listed contacts first so their keys cannot change before the check below.
+        contacts = db.query(Contact).filter(
+            and_(Contact.user_id == user.id, Contact.id.in_([body.primary_id, *duplicate_ids]))
+        ).with_for_update().all()
+        by_id = {contact.id: contact for contact in contacts}
+        if len(by_id) != len(duplicate_ids) + 1:
+            raise HTTPException(status_code=404,
+                                detail="Contact not found")
+
+        rows = db.query(Contact.id, Contact.email_key, Contact.phone_e164).filter(Contact.user_id == user.id).all()
+        roots = _duplicate_roots(rows)
+        unrelated = [contact_id for contact_id in duplicate_ids if roots[contact_id] != roots[body.primary_id]]
+        if unrelated:
+            raise HTTPException(status_code=422,
+                                detail=f"Contacts {unrelated} are not duplicates of contact {body.primary_id}")
+
+        primary = by_id[body.primary_id]
+        _fill_from_duplicates(primary, [by_id[contact_id] for contact_id in duplicate_ids])
+
+        stmt = _delete_contacts_stmt(and_(Contact.user_id == user.id, Contact.id.in_(duplicate_ids)))
+        if len(db.execute(stmt).all()) != len(duplicate_ids):
+            raise HTTPException(status_code=404,
+                                detail="Contact not found")
+
+        primary.updated_at = func.now()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    await publish_change(user.id, "updated", body.primary_id)
+    for contact_id in duplicate_ids:
+        await publish_change(user.id, "deleted", contact_id)
 
 
+@releases_connection
 async def found_contact(db: Session, first_name: str = None, last_name: str = None, email: str = None, user: User = None):
     """
     Searches for contacts by partial first name, last name, or email.
@@ -144,7 +534,7 @@ async def found_contact(db: Session, first_name: str = None, last_name: str = No
     :type last_name: str, optional
     :param email: Email to search for.
     :type email: str, optional
-    :param user: (Reserved) The user who owns the contacts (not yet used).
+    :param user: The user who owns the contacts; restricts the search to their partition.
     :type user: User, optional
     :return: A list of contacts matching the criteria.
     :rtype: list[Contact]
@@ -160,5 +550,8 @@ async def found_contact(db: Session, first_name: str = None, last_name: str = No
     if not filters:
         return []
 
-    result = db.query(Contact).filter(or_(*filters)).all()
+    query = db.query(Contact).filter(or_(*filters))
+    if user is not None:
+        query = query.filter(Contact.user_id == user.id)
+    result = query.all()
     return result
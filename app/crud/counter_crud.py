@@ -0,0 +1,102 @@
+from sqlalchemy import CTE, and_, func, select, update
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Session
+
+from app.models.db_models import Contact, ContactCounter
+
+
+def contact_count_change(changed: CTE, sign: int) -> Insert:
+    """
+    Builds the counter upsert for the contacts returned by a write statement.
+
+    ``changed`` is the ``INSERT``/``DELETE ... RETURNING user_id`` of the write, wrapped in a
+    CTE, so the counter moves in the same statement and round trip as the write itself.
+
+    :param changed: CTE over the inserted or deleted contacts, exposing ``user_id``.
+    :type changed: CTE
+    :param sign: 1 for inserted contacts, -1 for deleted ones.
+    :type sign: int
+    :return: The ``INSERT ... ON CONFLICT DO UPDATE`` statement.
+    :rtype: Insert
+    """
+    stmt = insert(ContactCounter).from_select(
+        [ContactCounter.user_id, ContactCounter.contact_count],
+        select(changed.c.user_id, sign * func.count()).group_by(changed.c.user_id)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ContactCounter.user_id],
+        set_={"contact_count": ContactCounter.contact_count + stmt.excluded.contact_count}
+    )
+
+
+async def get_contact_count(user_id: int, db: Session) -> int:
+    """
+    Returns the number of contacts a user has from the maintained counter.
+
+    A missing counter row is seeded from a one-off ``COUNT(*)``, so after that
+    the read is a primary-key lookup.
+
+    :param user_id: The user whose contacts are counted.
+    :type user_id: int
+    :param db: The database session.
+    :type db: Session
+    :return: The number of contacts.
+    :rtype: int
+    """
+    counter = db.get(ContactCounter, user_id)
+    if counter is not None:
+        return max(counter.contact_count, 0)
+
+    count = db.query(func.count(Contact.id)).filter(Contact.user_id == user_id).scalar()
+    stmt = insert(ContactCounter).values(user_id=user_id, contact_count=count, reconciled_at=func.now())
+    db.execute(stmt.on_conflict_do_nothing(index_elements=[ContactCounter.user_id]))
+    db.commit()
+    return count
+
+
+async def reconcile_contact_counters(db: Session, batch_size: int = 1000) -> None:
+    """
+    Recomputes the maintained contact counters from the contacts table.
+
+    Corrects drift left by writes that bypassed the counter. Counters are processed in
+    batches of ``batch_size`` users, one transaction each. A batch's counter rows are
+    locked first, so writers still holding them finish before the count is taken, and
+    writers arriving later wait and apply their increment on top of the corrected value.
+    The count and the correction are then a single ``UPDATE ... FROM`` that only touches
+    counters that drifted. Users without a counter row are seeded on first read by
+    :func:`get_contact_count`.
+
+    :param db: The database session.
+    :type db: Session
+    :param batch_size: Number of users per transaction.
+    :type batch_size: int
+    """
+    last_id = 0
+    while True:
+        batch = db.scalars(
+            select(ContactCounter.user_id)
+            .where(ContactCounter.user_id > last_id)
+            .order_by(ContactCounter.user_id)
+            .limit(batch_size)
+            .with_for_update()
+        ).all()
+        if not batch:
+            db.commit()
+            return
+
+        counts = (
+            select(ContactCounter.user_id, func.count(Contact.id).label("contact_count"))
+            .select_from(ContactCounter)
+            .outerjoin(Contact, Contact.user_id == ContactCounter.user_id)
+            .where(ContactCounter.user_id.in_(batch))
+            .group_by(ContactCounter.user_id)
+            .subquery()
+        )
+        db.execute(
+            update(ContactCounter)
+            .where(and_(ContactCounter.user_id == counts.c.user_id,
+                        ContactCounter.contact_count != counts.c.contact_count))
+            .values(contact_count=counts.c.contact_count, reconciled_at=func.now())
+        )
+        db.commit()
+        last_id = batch[-1]
@@ -0,0 +1,47 @@
+import re
+
+_NON_DIGITS = re.compile(r"\D")
+_E164_DIGITS = re.compile(r"[1-9]\d{7,14}")
+
+
+def normalize_email(email: str | None) -> str | None:
+    """
+    Builds the duplicate-detection key for an email address.
+
+    :param email: Email address as entered by the user.
+    :type email: str, optional
+    :return: Trimmed, lower-cased address, or None if empty.
+    :rtype: str | None
+    """
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def to_e164(phone_number: str | None, default_country_code: str) -> str | None:
+    """
+    Normalizes a phone number to E.164 (``+`` followed by up to 15 digits).
+
+    Numbers written with ``+`` or the ``00`` international prefix keep their country code.
+    A single leading ``0`` is treated as a national trunk prefix and replaced with
+    ``default_country_code``. Anything else is assumed to already include a country code.
+
+    :param phone_number: Phone number as entered by the user.
+    :type phone_number: str, optional
+    :param default_country_code: Country calling code for national numbers, e.g. ``380``.
+    :type default_country_code: str
+    :return: The E.164 number, or None if the input cannot be a valid one.
+    :rtype: str | None
+    """
+    if not phone_number:
+        return None
+    digits = _NON_DIGITS.sub("", phone_number)
+    if phone_number.lstrip().startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = default_country_code + digits[1:]
+    if not _E164_DIGITS.fullmatch(digits):
+        return None
+    return f"+{digits}"
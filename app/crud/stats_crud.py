@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+
+from sqlalchemy import CTE, ColumnElement, Select, and_, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Session
+
+from app.database.db import releases_connection
+from app.models.db_models import Contact, ContactStat, User
+from app.models.contact_model import ContactStatsModel
+
+EMAIL_DOMAIN = "email_domain"
+BIRTH_MONTH = "birth_month"
+ADDED_WEEK = "added_week"
+UNKNOWN = "unknown"
+
+
+def _bucket(dimension: str, column: ColumnElement) -> ColumnElement:
+    if dimension == EMAIL_DOMAIN:
+        expression = func.nullif(func.split_part(column, '@', 2), '')
+    elif dimension == BIRTH_MONTH:
+        expression = func.to_char(column, 'MM')
+    else:
+        expression = func.to_char(func.date_trunc('week', column), 'YYYY-MM-DD')
+    return func.coalesce(expression, UNKNOWN)
+
+
+def stats_deltas(source: CTE, sign: int, **columns: ColumnElement) -> list[Select]:
+    """
+    Builds the per-bucket deltas for contacts returned by a write statement.
+
+    :param source: CTE over the written contacts, exposing ``user_id``.
+    :type source: CTE
+    :param sign: 1 for contacts entering a bucket, -1 for contacts leaving it.
+    :type sign: int
+    :param columns: Column of ``source`` holding each affected dimension's value, keyed by
+        ``email_domain`` (the normalized email), ``birth_month`` (the birthday) or
+        ``added_week`` (the creation time).
+    :return: SELECTs of ``(user_id, dimension, bucket, delta)``.
+    :rtype: list[Select]
+    """
+    return [
+        select(source.c.user_id.label('user_id'), literal(dimension).label('dimension'),
+               _bucket(dimension, column).label('bucket'), literal(sign).label('delta'))
+        for dimension, column in columns.items()
+    ]
+
+
+def contact_stats_change(deltas: list[Select]) -> Insert:
+    """
+    Builds the upsert that applies bucket deltas to ``contact_stats``.
+
+    Deltas for the same bucket are summed first, so an update that leaves a contact in
+    its bucket writes nothing.
+
+    :param deltas: Output of :func:`stats_deltas`.
+    :type deltas: list[Select]
+    :return: The ``INSERT ... ON CONFLICT DO UPDATE`` statement.
+    :rtype: Insert
+    """
+    changes = union_all(*deltas).subquery('changes')
+    total = func.sum(changes.c.delta)
+    stmt = insert(ContactStat).from_select(
+        [ContactStat.user_id, ContactStat.dimension, ContactStat.bucket, ContactStat.contact_count],
+        select(changes.c.user_id, changes.c.dimension, changes.c.bucket, total)
+        .group_by(changes.c.user_id, changes.c.dimension, changes.c.bucket)
+        .having(total != 0)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ContactStat.user_id, ContactStat.dimension, ContactStat.bucket],
+        set_={"contact_count": ContactStat.contact_count + stmt.excluded.contact_count}
+    )
+
+
+@releases_connection
+async def get_stats_crud(user: User, db: Session) -> ContactStatsModel:
+    """
+    Reads a user's contact statistics from the maintained aggregates.
+
+    The cost depends on the number of buckets, not on the number of contacts.
+
+    :param user: The user whose statistics are returned.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Contact counts per email domain, birth month and week added.
+    :rtype: ContactStatsModel
+    """
+    rows = db.query(ContactStat.dimension, ContactStat.bucket, ContactStat.contact_count).filter(
+        and_(ContactStat.user_id == user.id, ContactStat.contact_count > 0)
+    ).all()
+    stats = {EMAIL_DOMAIN: {}, BIRTH_MONTH: {}, ADDED_WEEK: {}}
+    for dimension, bucket, contact_count in rows:
+        stats.setdefault(dimension, {})[bucket] = contact_count
+    return ContactStatsModel(
+        by_email_domain=stats[EMAIL_DOMAIN],
+        by_birth_month=dict(sorted(stats[BIRTH_MONTH].items())),
+        added_per_week=dict(sorted(stats[ADDED_WEEK].items()))
+    )
+
+
+async def rebuild_stats(db: Session, user_id: int | None = None) -> None:
+    """
+    Recomputes the statistics from the contacts table to correct drift.
+
+    Writes that commit while this runs may be counted twice or not at all; run it
+    again if it overlapped with heavy write traffic.
+
+    :param db: The database session.
+    :type db: Session
+    :param user_id: Only rebuild this user's statistics; all users when omitted.
+    :type user_id: int, optional
+    """
+    contacts = select(Contact.user_id, Contact.email_key, Contact.birthday, Contact.created_at)
+    if user_id is not None:
+        contacts = contacts.where(Contact.user_id == user_id)
+    contacts = contacts.cte('contacts_snapshot')
+
+    clear = delete(ContactStat)
+    if user_id is not None:
+        clear = clear.where(ContactStat.user_id == user_id)
+    db.execute(clear)
+    db.execute(contact_stats_change(stats_deltas(
+        contacts, 1, email_domain=contacts.c.email_key, birth_month=contacts.c.birthday,
+        added_week=contacts.c.created_at
+    )))
+    db.commit()
+
+
+def main() -> None:
+    from app.database.db import SessionLocal, get_engine
+
+    parser = argparse.ArgumentParser(description="Maintain the contact statistics aggregates.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="recompute statistics from the contacts table")
+    rebuild_parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        asyncio.run(rebuild_stats(db, args.user_id))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
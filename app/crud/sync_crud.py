@@ -0,0 +1,147 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.conf.config import get_settings
+from app.database.db import releases_connection
+from app.models.db_models import Contact, ContactTombstone, User
+from app.models.contact_model import ChangesResponseModel, DBModel
+
+Watermark = tuple[datetime, int]
+
+
+def encode_sync_token(contacts_mark: Watermark, deleted_mark: Watermark) -> str:
+    """
+    Packs the contact and tombstone watermarks into an opaque token.
+
+    :param contacts_mark: ``(updated_at, id)`` of the last contact returned.
+    :type contacts_mark: Watermark
+    :param deleted_mark: ``(deleted_at, id)`` of the last tombstone returned.
+    :type deleted_mark: Watermark
+    :return: URL-safe token.
+    :rtype: str
+    """
+    payload = {"c": [contacts_mark[0].isoformat(), contacts_mark[1]],
+               "d": [deleted_mark[0].isoformat(), deleted_mark[1]]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def decode_sync_token(token: str) -> tuple[Watermark, Watermark]:
+    """
+    Unpacks a token produced by :func:`encode_sync_token`.
+
+    :param token: The token sent by the client.
+    :type token: str
+    :return: The contact and tombstone watermarks.
+    :rtype: tuple[Watermark, Watermark]
+    :raises HTTPException: If the token is malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return ((datetime.fromisoformat(payload["c"][0]), int(payload["c"][1])),
+                (datetime.fromisoformat(payload["d"][0]), int(payload["d"][1])))
+    except (binascii.Error, ValueError, KeyError, IndexError, TypeError):
+        raise HTTPException(status_code=400,
+                            detail="Invalid sync token")
+
+
+def _next_mark(mark: Watermark, rows: list[Watermark], limit: int, upper: datetime) -> Watermark:
+    """
+    Advances a watermark past the rows returned in this page.
+
+    When the page was not truncated, everything up to ``upper`` has been seen and the mark
+    moves to ``upper`` even if nothing changed. Otherwise the tombstone mark of a client
+    that never deletes anything would stay at its first sync and expire after
+    ``tombstone_retention_days``.
+
+    :param mark: The watermark from the client's token.
+    :type mark: Watermark
+    :param rows: ``(timestamp, id)`` of the rows read, at most ``limit + 1``.
+    :type rows: list[Watermark]
+    :param limit: Page size.
+    :type limit: int
+    :param upper: Settled upper bound of this read.
+    :type upper: datetime
+    :return: The watermark for the next token.
+    :rtype: Watermark
+    """
+    if len(rows) > limit:
+        return rows[limit - 1]
+    return max(mark, *rows, (upper, 0))
+
+
+@releases_connection
+async def get_changes_crud(since: str | None, limit: int, user: User, db: Session) -> ChangesResponseModel:
+    """
+    Returns the contacts changed and deleted since a sync token.
+
+    Contacts are read by keyset on ``(user_id, updated_at, id)`` and deletions from the
+    tombstone log, so the cost follows the number of changes rather than the size of the
+    address book. Rows newer than ``sync_settle_seconds`` are held back until the next
+    call so that transactions still committing with an earlier timestamp are not skipped.
+    Without a token every contact is returned, in pages.
+
+    :param since: Token from the previous response, or None for a full sync.
+    :type since: str, optional
+    :param limit: Maximum number of contacts and of deletions per response.
+    :type limit: int
+    :param user: The user whose contacts are synced.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Changed contacts, deleted contact ids and the next token.
+    :rtype: ChangesResponseModel
+    :raises HTTPException: If the token is invalid or older than the tombstone retention.
+    """
+    settings = get_settings()
+    upper = db.scalar(select(func.localtimestamp() - timedelta(seconds=settings.sync_settle_seconds)))
+    if since:
+        contacts_mark, deleted_mark = decode_sync_token(since)
+        if deleted_mark[0] < upper - timedelta(days=settings.tombstone_retention_days):
+            raise HTTPException(status_code=410,
+                                detail="Sync token expired, perform a full sync")
+    else:
+        contacts_mark, deleted_mark = (datetime.min, 0), (upper, 0)
+
+    contacts = db.query(Contact).filter(and_(
+        Contact.user_id == user.id,
+        tuple_(Contact.updated_at, Contact.id) > contacts_mark,
+        Contact.updated_at <= upper
+    )).order_by(Contact.updated_at, Contact.id).limit(limit + 1).all()
+
+    tombstones = db.query(ContactTombstone).filter(and_(
+        ContactTombstone.user_id == user.id,
+        tuple_(ContactTombstone.deleted_at, ContactTombstone.id) > deleted_mark,
+        ContactTombstone.deleted_at <= upper
+    )).order_by(ContactTombstone.deleted_at, ContactTombstone.id).limit(limit + 1).all()
+
+    has_more = len(contacts) > limit or len(tombstones) > limit
+    contacts_mark = _next_mark(contacts_mark, [(c.updated_at, c.id) for c in contacts], limit, upper)
+    deleted_mark = _next_mark(deleted_mark, [(t.deleted_at, t.id) for t in tombstones], limit, upper)
+    contacts, tombstones = contacts[:limit], tombstones[:limit]
+
+    return ChangesResponseModel(
+        contacts=[DBModel.from_orm(c) for c in contacts],
+        deleted=[t.contact_id for t in tombstones],
+        next_token=encode_sync_token(contacts_mark, deleted_mark),
+        has_more=has_more
+    )
+
+
+async def compact_tombstones(db: Session) -> None:
+    """
+    Deletes tombstones older than the retention period.
+
+    Clients holding a token older than the retention get 410 and re-sync from scratch.
+
+    :param db: The database session.
+    :type db: Session
+    """
+    cutoff = func.localtimestamp() - timedelta(days=get_settings().tombstone_retention_days)
+    db.execute(delete(ContactTombstone).where(ContactTombstone.deleted_at < cutoff))
+    db.commit()
@@ -1,16 +1,83 @@
+import inspect
+from functools import lru_cache, wraps
+from typing import Awaitable, Callable, TypeVar
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from app.conf.config import settings
+from app.conf.config import get_settings
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    Creates the SQLAlchemy engine on first use and caches it.
+
+    :return: The database engine.
+    :rtype: Engine
+    """
+    return create_engine(get_settings().sqlalchemy_database_url, pool_pre_ping=True)
+
+
+def prewarm_pool(connections: int) -> None:
+    """
+    Opens and returns ``connections`` connections to the pool so first requests skip the connect.
+
+    :param connections: Number of pool connections to establish.
+    :type connections: int
+    """
+    engine = get_engine()
+    opened = [engine.connect() for _ in range(connections)]
+    for connection in opened:
+        connection.close()
+
+
+def pool_status() -> dict:
+    """
+    Reports how many pooled connections are in use.
+
+    :return: Pool size, checked-out and idle connections, and current overflow.
+    :rtype: dict
+    """
+    pool = get_engine().pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+T = TypeVar("T")
+
+
+def releases_connection(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Closes the ``db`` session passed to a CRUD function once it returns or raises.
 
+    A session only checks out a connection at its first query, but then keeps it until
+    the transaction ends. Read paths never commit, so without this the connection would
+    stay checked out through response serialization and background tasks. The session
+    stays usable afterwards and checks out a new connection if it is queried again.
+    """
+    signature = inspect.signature(fn)
 
-SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            signature.bind(*args, **kwargs).arguments["db"].close()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return wrapper
 
 
 def get_db():
-    db = SessionLocal()
+    # Creating the session is cheap: no connection is checked out until the first query.
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
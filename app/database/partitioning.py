@@ -0,0 +1,95 @@
+"""
+Online backfill of ``contacts`` into the hash-partitioned layout.
+
+Run after revision 7f3b9c2e5a18, which creates ``contacts_partitioned`` and the trigger that
+mirrors new writes, and before revision a92d4e6c1b37, which swaps the tables::
+
+    alembic upgrade 7f3b9c2e5a18
+    python -m app.database.partitioning backfill --batch-size 10000
+    python -m app.database.partitioning verify
+    alembic upgrade head
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.database.db import get_engine
+
+COLUMNS = ('id, first_name, last_name, email, phone_number, birthday, created_at, updated_at, '
+           'user_id, email_key, phone_e164')
+
+# FOR KEY SHARE blocks concurrent deletes of the batch until it commits, so the
+# mirror trigger cannot delete a row before the backfill copies a stale version of it.
+COPY_BATCH = text(
+    f"INSERT INTO contacts_partitioned ({COLUMNS}) "
+    f"SELECT {COLUMNS} FROM contacts "
+    "WHERE id > :after AND id <= :until AND user_id IS NOT NULL "
+    "FOR KEY SHARE "
+    "ON CONFLICT (id, user_id) DO NOTHING"
+)
+
+MISSING_ROWS = text(
+    "SELECT count(*) FROM contacts c WHERE c.user_id IS NOT NULL AND NOT EXISTS "
+    "(SELECT 1 FROM contacts_partitioned p WHERE p.id = c.id AND p.user_id = c.user_id)"
+)
+
+
+def backfill(batch_size: int = 10000, pause: float = 0.0) -> int:
+    """
+    Copies existing contacts into ``contacts_partitioned`` in id-range batches.
+
+    Each batch commits on its own, so locks are short and the copy can be stopped and
+    rerun at any point; rows already present are skipped.
+
+    :param batch_size: Width of each id range.
+    :type batch_size: int
+    :param pause: Seconds to sleep between batches to limit load on the primary.
+    :type pause: float
+    :return: Number of rows copied.
+    :rtype: int
+    """
+    engine = get_engine()
+    with engine.connect() as connection:
+        max_id = connection.execute(text("SELECT coalesce(max(id), 0) FROM contacts")).scalar()
+
+    copied = 0
+    for after in range(0, max_id, batch_size):
+        with engine.begin() as connection:
+            copied += connection.execute(COPY_BATCH, {"after": after, "until": after + batch_size}).rowcount
+        if pause:
+            time.sleep(pause)
+    return copied
+
+
+def missing_rows(connection: Connection) -> int:
+    """
+    Counts contacts that are not yet present in ``contacts_partitioned``.
+
+    :param connection: Open database connection.
+    :type connection: Connection
+    :return: Number of contacts still to copy.
+    :rtype: int
+    """
+    return connection.execute(MISSING_ROWS).scalar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="copy existing contacts into the partitioned table")
+    backfill_parser.add_argument("--batch-size", type=int, default=10000)
+    backfill_parser.add_argument("--pause", type=float, default=0.0)
+    subparsers.add_parser("verify", help="count contacts missing from the partitioned table")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        print(f"Copied {backfill(args.batch_size, args.pause)} contacts")
+    else:
+        with get_engine().connect() as connection:
+            print(f"{missing_rows(connection)} contacts missing from contacts_partitioned")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from functools import lru_cache
+
+import redis.asyncio as redis
+
+from app.conf.config import get_settings
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """
+    Creates the shared Redis client on first use and caches it.
+
+    The client connects lazily, so calling this does no network I/O.
+
+    :return: The Redis client.
+    :rtype: redis.Redis
+    """
+    settings = get_settings()
+    return redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
+                       decode_responses=True)
@@ -0,0 +1,63 @@
+import logging
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.conf.log_config import ACCESS_LOGGER, current_request_context, end_request_context, start_request_context
+
+logger = logging.getLogger(ACCESS_LOGGER)
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class AccessLogMiddleware:
+    """
+    Writes one structured access record per HTTP request.
+
+    Reuses an incoming ``X-Request-ID`` or generates one, returns it in the response and
+    makes it available to every record logged while the request is handled. The record
+    carries route, status, latency and the time spent in SQL.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next((value.decode("latin-1") for name, value in scope["headers"]
+                           if name == REQUEST_ID_HEADER), None) or uuid.uuid4().hex
+        token = start_request_context(request_id)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            logger.exception("Unhandled error", extra={"method": scope["method"], "path": scope["path"]})
+            raise
+        finally:
+            context = current_request_context()
+            route = scope.get("route")
+            logger.info(
+                "%s %s %s", scope["method"], scope["path"], status_code,
+                extra={
+                    "method": scope["method"],
+                    "route": getattr(route, "path", scope["path"]),
+                    "status_code": status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "db_ms": round(context.db_ms, 3),
+                    "db_queries": context.db_queries,
+                },
+            )
+            end_request_context(token)
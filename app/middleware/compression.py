@@ -0,0 +1,222 @@
+import zlib
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.conf.config import get_settings
+
+COMPRESSIBLE_TYPES = ("application/json", "text/csv", "text/plain", "text/html", "application/xml")
+UNCOMPRESSED_STATUSES = (204, 304)
+
+
+class GzipEncoder:
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+
+    def __init__(self, level: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+
+    def __init__(self, level: int):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS = {"zstd": ("zstandard", ZstdEncoder), "br": ("brotli", BrotliEncoder), "gzip": (None, GzipEncoder)}
+
+
+@lru_cache
+def available_encodings() -> tuple[str, ...]:
+    """
+    Lists the configured encodings whose library is installed, in server preference order.
+
+    brotli and zstandard are optional; without them only gzip is offered.
+
+    :return: Encoding names usable in ``Content-Encoding``.
+    :rtype: tuple[str, ...]
+    """
+    from importlib.util import find_spec
+
+    return tuple(name for name in get_settings().compression_encodings
+                 if name in ENCODERS and (ENCODERS[name][0] is None or find_spec(ENCODERS[name][0])))
+
+
+def negotiate_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    """
+    Picks the encoding with the highest ``q`` in ``Accept-Encoding``; ties go to the server's order.
+
+    :param accept_encoding: The request header value.
+    :type accept_encoding: str
+    :param available: Encodings the server can produce, most preferred first.
+    :type available: tuple[str, ...]
+    :return: The chosen encoding, or ``None`` to send the body as is.
+    :rtype: str | None
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name:
+            weights[name.strip().lower()] = quality
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in available:
+        quality = weights.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def encoder_level(encoding: str) -> int:
+    settings = get_settings()
+    return {"gzip": settings.compression_gzip_level, "br": settings.compression_brotli_quality,
+            "zstd": settings.compression_zstd_level}[encoding]
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts.
+
+    Bodies below ``compression_minimum_size`` are sent as is, and so are event streams,
+    non-text content types and responses that already have a ``Content-Encoding``.
+    Streaming responses are buffered only until they pass the threshold; after that each
+    chunk is compressed and flushed as it arrives, so downloads such as the CSV export
+    still reach the client incrementally. Large single bodies are compressed in the
+    threadpool to keep the event loop free.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not get_settings().compression_enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), available_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSender(send, encoding).send)
+
+
+class CompressingSender:
+
+    def __init__(self, send: Send, encoding: str):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = get_settings().compression_minimum_size
+        self.threadpool_size = get_settings().compression_threadpool_size
+        self.start: Message | None = None
+        self.encoder = None
+        self.passthrough = False
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message.get("headers", []))
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if (message["status"] in UNCOMPRESSED_STATUSES or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                self.passthrough = True
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.encoder is not None:
+            await self._send_compressed(body, more_body)
+            return
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if self.buffered < self.minimum_size:
+            if more_body:
+                return
+            await self._send_uncompressed()
+            return
+
+        body, self.buffer = b"".join(self.buffer), []
+        self.encoder = ENCODERS[self.encoding][1](encoder_level(self.encoding))
+        headers = MutableHeaders(raw=self.start.setdefault("headers", []))
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["content-length"]
+            await self._send(self.start)
+            await self._send_compressed(body, True)
+            return
+        if len(body) >= self.threadpool_size:
+            compressed = await run_in_threadpool(self._compress_all, body)
+        else:
+            compressed = self._compress_all(body)
+        headers["content-length"] = str(len(compressed))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    def _compress_all(self, body: bytes) -> bytes:
+        return self.encoder.compress(body) + self.encoder.finish()
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        if more_body:
+            data = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            data = self.encoder.compress(body) + self.encoder.finish()
+        if data or not more_body:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_uncompressed(self) -> None:
+        headers = MutableHeaders(raw=self.start.setdefault("headers", []))
+        headers.add_vary_header("Accept-Encoding")
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": b"".join(self.buffer)})
@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from functools import lru_cache
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.conf.config import get_settings
+
+# (path prefix, methods or None for any, priority); lower numbers are admitted first.
+ROUTE_PRIORITIES = (
+    ("/auth", None, 0),
+    ("/api", {"POST", "PUT", "DELETE"}, 1),
+    ("/api", None, 2),
+)
+DEFAULT_PRIORITY = 2
+
+# Long-lived streams would hold a slot for their whole lifetime; admin endpoints must
+# stay reachable while the service is overloaded.
+EXEMPT_PREFIXES = ("/admin", "/api/contacts/stream")
+
+
+def route_priority(method: str, path: str) -> int:
+    for prefix, methods, priority in ROUTE_PRIORITIES:
+        if path.startswith(prefix) and (methods is None or method in methods):
+            return priority
+    return DEFAULT_PRIORITY
+
+
+class AdaptiveLimiter:
+    """
+    Caps concurrent requests, queueing a bounded number of waiters by priority.
+
+    The limit follows AIMD against a latency target: it grows by about one slot per
+    window of on-target requests while saturated and shrinks by ``decrease_factor`` (at
+    most once per target interval) when requests take longer than the target. When the
+    queue is full, a new request evicts the lowest-priority waiter if it outranks it and
+    is rejected otherwise.
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int, queue_size: int,
+                 target_latency: float, decrease_factor: float = 0.9):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.inflight = 0
+        self.queued = 0
+        self.latency_ewma = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "evicted": 0, "timed_out": 0}
+
+    async def acquire(self, priority: int, timeout: float) -> bool:
+        """
+        Waits for a slot.
+
+        :param priority: Lower values are admitted first.
+        :type priority: int
+        :param timeout: Longest time to wait in the queue, in seconds.
+        :type timeout: float
+        :return: ``True`` once admitted; ``False`` if shed, in which case the caller must not release.
+        :rtype: bool
+        """
+        self._admit_waiters()
+        if self.inflight < int(self.limit) and not self.queued:
+            self.inflight += 1
+            self.stats["admitted"] += 1
+            return True
+        if self.queued >= self.queue_size and not self._evict_below(priority):
+            self.stats["rejected"] += 1
+            return False
+
+        if len(self._waiters) >= 2 * self.queue_size:
+            self._prune()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.queued += 1
+        self.stats["queued"] += 1
+        try:
+            admitted = await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.cancelled():
+                self.queued -= 1
+            elif future.result():
+                # Admitted just as the wait ended; hand the slot on.
+                self.inflight -= 1
+                self._admit_waiters()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["timed_out"] += 1
+            return False
+        if admitted:
+            self.stats["admitted"] += 1
+        return admitted
+
+    def release(self, latency: float) -> None:
+        """
+        Frees a slot, adapts the limit to the request's latency and admits waiters.
+
+        :param latency: Seconds the request held its slot.
+        :type latency: float
+        """
+        self.inflight -= 1
+        self.latency_ewma = latency if not self.latency_ewma else 0.9 * self.latency_ewma + 0.1 * latency
+        now = time.monotonic()
+        if latency > self.target_latency:
+            if now - self._last_decrease > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = now
+        elif self.inflight + 1 >= int(self.limit):
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._admit_waiters()
+
+    def _admit_waiters(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.queued -= 1
+            self.inflight += 1
+            future.set_result(True)
+
+    def _prune(self) -> None:
+        # Drops waiters that timed out or were evicted but were never popped.
+        self._waiters = [entry for entry in self._waiters if not entry[2].done()]
+        heapq.heapify(self._waiters)
+
+    def _evict_below(self, priority: int) -> bool:
+        self._prune()
+        if not self._waiters:
+            return False
+        worst = max(self._waiters, key=lambda entry: (entry[0], entry[1]))
+        if worst[0] <= priority:
+            return False
+        self.queued -= 1
+        self.stats["evicted"] += 1
+        worst[2].set_result(False)
+        return True
+
+    def status(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 3),
+            **self.stats,
+        }
+
+
+@lru_cache
+def get_load_limiter() -> AdaptiveLimiter:
+    """
+    Builds the per-worker limiter from the settings on first use.
+
+    :return: The shared limiter.
+    :rtype: AdaptiveLimiter
+    """
+    settings = get_settings()
+    return AdaptiveLimiter(
+        initial_limit=settings.load_shed_initial_limit,
+        min_limit=settings.load_shed_min_limit,
+        max_limit=settings.load_shed_max_limit,
+        queue_size=settings.load_shed_queue_size,
+        target_latency=settings.load_shed_target_latency_ms / 1000,
+    )
+
+
+class LoadSheddingMiddleware:
+    """
+    Admits HTTP requests through the adaptive limiter and sheds the rest.
+
+    Shed requests get an immediate 503 with ``Retry-After`` instead of piling up on
+    the event loop and the DB pool.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        settings = get_settings()
+        if not settings.load_shed_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = get_load_limiter()
+        priority = route_priority(scope["method"], scope["path"])
+        if not await limiter.acquire(priority, settings.load_shed_queue_timeout_ms / 1000):
+            await self._reject(send, settings.load_shed_retry_after)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(send: Send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Service is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
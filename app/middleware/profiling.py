@@ -0,0 +1,258 @@
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from ipaddress import ip_address
+from pathlib import Path
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.conf.config import get_settings
+from app.database.db import get_engine
+from app.database.redis_db import get_redis
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    method: str
+    path: str
+    started_at: float
+    duration_ms: float = 0.0
+    status_code: int | None = None
+    samples: int = 0
+    sql: list[dict] = field(default_factory=list)
+    redis: list[dict] = field(default_factory=list)
+
+
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    Stacks are kept in collapsed form (``outer;inner;leaf count``), which flamegraph.pl
+    and speedscope read directly. Profiling the event loop thread also catches other
+    requests that happen to run while the profiled one is awaiting I/O.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_stack = conn.info.get("profile_started")
+    if not started_stack:
+        # The statement began before instrumentation was switched on.
+        return
+    started = started_stack.pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.sql.append({"statement": statement, "duration_ms": (time.perf_counter() - started) * 1000})
+
+
+class _Instrumentation:
+    """
+    Hooks SQL and Redis timing in only while at least one profiled request is running.
+    """
+
+    def __init__(self):
+        self._active = 0
+
+    def acquire(self) -> None:
+        self._active += 1
+        if self._active > 1:
+            return
+        engine = get_engine()
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        client = get_redis()
+        execute_command = client.execute_command
+
+        async def timed_execute_command(*args, **options):
+            profile = _current_profile.get()
+            if profile is None:
+                return await execute_command(*args, **options)
+            started = time.perf_counter()
+            try:
+                return await execute_command(*args, **options)
+            finally:
+                profile.redis.append({"command": str(args[0]), "duration_ms": (time.perf_counter() - started) * 1000})
+
+        client.execute_command = timed_execute_command
+
+    def release(self) -> None:
+        self._active -= 1
+        if self._active > 0:
+            return
+        engine = get_engine()
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+        del get_redis().execute_command
+
+
+def profile_client_allowed(host: str | None) -> bool:
+    """
+    Checks a client address against ``profile_allowed_ips``.
+
+    :param host: The client's IP address, if known.
+    :type host: str | None
+    :return: Whether the client may request and read profiles.
+    :rtype: bool
+    """
+    if host is None:
+        return False
+    try:
+        return ip_address(host) in {ip_address(ip) for ip in get_settings().profile_allowed_ips}
+    except ValueError:
+        return False
+
+
+class ProfileStore:
+    """
+    Keeps the most recent profiles on disk, as collapsed stacks plus a JSON summary.
+
+    Everything is read back from ``profile_dir``, which all workers share, so any worker
+    can serve a profile recorded by another. Files past ``profile_keep`` are pruned by
+    modification time after every save, including ones left by earlier processes.
+    """
+
+    @property
+    def directory(self) -> Path:
+        return Path(get_settings().profile_dir)
+
+    def save(self, profile: RequestProfile, stacks: Counter) -> None:
+        directory = self.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{profile.id}.folded").write_text(
+            "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+        )
+        (directory / f"{profile.id}.json").write_text(json.dumps(asdict(profile)))
+        for expired in self._ids()[get_settings().profile_keep:]:
+            for suffix in (".folded", ".json"):
+                (directory / f"{expired}{suffix}").unlink(missing_ok=True)
+
+    def _ids(self) -> list[str]:
+        # Profile ids on disk, newest first.
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                profiles.append((path.stat().st_mtime, path.stem))
+            except FileNotFoundError:
+                continue
+        return [profile_id for _, profile_id in sorted(profiles, reverse=True) if PROFILE_ID.fullmatch(profile_id)]
+
+    def _read(self, profile_id: str, suffix: str) -> str | None:
+        if not PROFILE_ID.fullmatch(profile_id):
+            return None
+        try:
+            return (self.directory / f"{profile_id}{suffix}").read_text()
+        except FileNotFoundError:
+            return None
+
+    def list(self) -> list[dict]:
+        return [summary for profile_id in self._ids() if (summary := self.get(profile_id))]
+
+    def get(self, profile_id: str) -> dict | None:
+        text = self._read(profile_id, ".json")
+        return None if text is None else json.loads(text)
+
+    def folded(self, profile_id: str) -> str | None:
+        return self._read(profile_id, ".folded")
+
+
+profile_store = ProfileStore()
+_instrumentation = _Instrumentation()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests that carry ``X-Profile: 1`` from an allowlisted IP.
+
+    Settings are read on the first request. When ``profiling_enabled`` is off, every
+    request goes straight to the app; when on, requests without the header only pay
+    for a header lookup. The profile id is returned in ``X-Profile-Id``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled: bool | None = None
+        self.allowed_ips = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.enabled is None:
+            settings = get_settings()
+            self.enabled = settings.profiling_enabled
+            self.allowed_ips = {ip_address(ip) for ip in settings.profile_allowed_ips}
+        if not self.enabled or scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        profile = RequestProfile(id=uuid.uuid4().hex, method=scope["method"], path=scope["path"],
+                                 started_at=time.time())
+        token = _current_profile.set(profile)
+        _instrumentation.acquire()
+        sampler = StackSampler(threading.get_ident(), settings.profile_interval_ms / 1000)
+        sampler.start()
+        started = time.perf_counter()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            stacks = sampler.stop()
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            profile.samples = sum(stacks.values())
+            _instrumentation.release()
+            _current_profile.reset(token)
+            await run_in_threadpool(profile_store.save, profile, stacks)
+
+    def _requested(self, scope: Scope) -> bool:
+        if not any(name == PROFILE_HEADER and value in (b"1", b"true") for name, value in scope["headers"]):
+            return False
+        client = scope.get("client")
+        try:
+            return client is not None and ip_address(client[0]) in self.allowed_ips
+        except ValueError:
+            return False
@@ -1,7 +1,8 @@
 from datetime import date, datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, create_model
 
 
 class ResponseMessageModel(BaseModel):
@@ -25,6 +26,7 @@ class PutRequestModel(BaseModel):
 
 
 class DBModel(PostRequestModel):
+    id: int
     created_at: datetime
     updated_at: datetime
 
@@ -36,3 +38,60 @@ class GetAllResponseModel(BaseModel):
     contacts: List[DBModel]
     skip: int
     limit: int
+    total: int
+
+
+CONTACT_FIELDS = tuple(DBModel.model_fields)
+
+
+@lru_cache
+def partial_contact_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Builds a contact model with only the requested fields, once per combination.
+
+    :param fields: Field names of :class:`DBModel`, in ``CONTACT_FIELDS`` order.
+    :type fields: tuple[str, ...]
+    :return: The partial contact model.
+    :rtype: type[BaseModel]
+    """
+    return create_model(f"Contact_{'_'.join(fields)}",
+                        **{name: (DBModel.model_fields[name].annotation, ...) for name in fields})
+
+
+@lru_cache
+def partial_page_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    return create_model(f"ContactPage_{'_'.join(fields)}", contacts=(List[partial_contact_model(fields)], ...),
+                        skip=(int, ...), limit=(int, ...), total=(int, ...))
+
+
+class AutocompleteItemModel(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+
+
+class DuplicateGroupModel(BaseModel):
+    contacts: List[DBModel]
+
+
+class DuplicatesResponseModel(BaseModel):
+    groups: List[DuplicateGroupModel]
+
+
+class MergeRequestModel(BaseModel):
+    primary_id: int = Field(..., description="Contact that is kept")
+    duplicate_ids: List[int] = Field(..., min_length=1, description="Contacts merged into the primary one")
+
+
+class ChangesResponseModel(BaseModel):
+    contacts: List[DBModel]
+    deleted: List[int]
+    next_token: str
+    has_more: bool
+
+
+class ContactStatsModel(BaseModel):
+    by_email_domain: Dict[str, int]
+    by_birth_month: Dict[str, int]
+    added_per_week: Dict[str, int]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, func, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, func, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import DateTime, Date
 from sqlalchemy.ext.declarative import declarative_base
@@ -8,7 +8,7 @@ Base = declarative_base()
 
 class Contact(Base):
     __tablename__ = 'contacts'
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     email = Column(String(50), nullable=False)
@@ -16,9 +16,20 @@ class Contact(Base):
     birthday = Column(Date, nullable=False)
     created_at = Column('created_at', DateTime, default=func.now())
     updated_at = Column('updated_at', DateTime, default=func.now())
-    user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), default=None)
+    # Part of the primary key because the table is hash-partitioned by user_id.
+    user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    email_key = Column(String(50), nullable=True)
+    phone_e164 = Column(String(16), nullable=True)
     user = relationship('User', backref='contacts')
 
+    __table_args__ = (
+        Index('ix_contacts_user_id_email_key', 'user_id', 'email_key'),
+        Index('ix_contacts_user_id_phone_e164', 'user_id', 'phone_e164'),
+        Index('ix_contacts_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        {'postgresql_partition_by': 'HASH (user_id)'},
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -29,3 +40,31 @@ class User(Base):
     created_at = Column('created_at', DateTime, default=func.now())
     confirmed = Column(Boolean, default=False)
 
+
+
+class ContactCounter(Base):
+    __tablename__ = "contact_counters"
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    contact_count = Column(Integer, nullable=False, default=0)
+    reconciled_at = Column('reconciled_at', DateTime, nullable=True)
+
+
+class ContactTombstone(Base):
+    __tablename__ = "contact_tombstones"
+    id = Column(Integer, primary_key=True)
+    contact_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    deleted_at = Column('deleted_at', DateTime, nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index('ix_contact_tombstones_user_id_deleted_at', 'user_id', 'deleted_at', 'id'),
+        Index('ix_contact_tombstones_deleted_at', 'deleted_at'),
+    )
+
+
+class ContactStat(Base):
+    __tablename__ = "contact_stats"
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    dimension = Column(String(16), primary_key=True)
+    bucket = Column(String(64), primary_key=True)
+    contact_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,135 @@
+import sys
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable
+
+from app.conf.config import get_settings
+from app.services.change_feed import hub
+
+
+class PrefixIndex:
+    """
+    Sorted array of lower-cased search terms for one user's contacts.
+
+    Each contact contributes its first name, last name, full name and email, so a
+    prefix of any of them finds it. Lookups are a bisect plus a scan over the matches.
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str, str, str]]):
+        self.contacts: dict[int, tuple[str, str, str]] = {}
+        entries = []
+        for contact_id, first_name, last_name, email in rows:
+            self.contacts[contact_id] = (first_name, last_name, email)
+            for term in {first_name.lower(), last_name.lower(), f"{first_name} {last_name}".lower(), email.lower()}:
+                entries.append((term, contact_id))
+        entries.sort()
+        self.terms = [term for term, _ in entries]
+        self.ids = [contact_id for _, contact_id in entries]
+        self.size = (sys.getsizeof(self.terms) + sys.getsizeof(self.ids) + sys.getsizeof(self.contacts)
+                     + sum(map(sys.getsizeof, self.terms)) + 32 * len(self.ids)
+                     + sum(sum(map(sys.getsizeof, contact)) + 64 for contact in self.contacts.values()))
+
+    def search(self, prefix: str, limit: int) -> list[tuple[int, str, str, str]]:
+        found = {}
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and len(found) < limit and self.terms[position].startswith(prefix):
+            contact_id = self.ids[position]
+            if contact_id not in found:
+                found[contact_id] = (contact_id, *self.contacts[contact_id])
+            position += 1
+        return list(found.values())
+
+
+class AutocompleteCache:
+    """
+    Keeps prefix indexes for recently active users within a memory budget.
+
+    Least recently used users are evicted once the estimated size passes
+    ``autocomplete_cache_bytes``. A user's index is dropped on any change to their
+    contacts, as announced on the change feed, and is otherwise trusted for at most
+    ``autocomplete_ttl`` seconds in case an event was lost.
+    """
+
+    def __init__(self):
+        self._indexes: OrderedDict[int, tuple[PrefixIndex, float]] = OrderedDict()
+        # Users whose index is being built: number of builders, and whether a change arrived meanwhile.
+        self._building: dict[int, list] = {}
+        self.size = 0
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0, "invalidated": 0}
+
+    def get(self, user_id: int) -> PrefixIndex | None:
+        hub.watch(self.on_change)
+        entry = self._indexes.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            self.stats["misses"] += 1
+            return None
+        self._indexes.move_to_end(user_id)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def begin_build(self, user_id: int) -> None:
+        """
+        Marks that the user's contacts are about to be loaded for a new index.
+
+        Every call must be followed by :meth:`put` or :meth:`abort_build`.
+
+        :param user_id: The user whose index is built.
+        :type user_id: int
+        """
+        self._building.setdefault(user_id, [0, False])[0] += 1
+
+    def abort_build(self, user_id: int) -> bool:
+        state = self._building[user_id]
+        state[0] -= 1
+        if not state[0]:
+            del self._building[user_id]
+        return state[1]
+
+    def put(self, user_id: int, index: PrefixIndex) -> None:
+        """
+        Caches an index unless the user's contacts changed while it was being built.
+
+        :param user_id: The user the index belongs to.
+        :type user_id: int
+        :param index: The freshly built index.
+        :type index: PrefixIndex
+        """
+        if self.abort_build(user_id):
+            return
+        self._drop(user_id)
+        settings = get_settings()
+        self._indexes[user_id] = (index, time.monotonic() + settings.autocomplete_ttl)
+        self.size += index.size
+        while self.size > settings.autocomplete_cache_bytes and len(self._indexes) > 1:
+            self._drop(next(iter(self._indexes)))
+            self.stats["evicted"] += 1
+
+    def invalidate(self, user_id: int) -> None:
+        if user_id in self._building:
+            self._building[user_id][1] = True
+        if self._drop(user_id):
+            self.stats["invalidated"] += 1
+
+    def clear(self) -> None:
+        for user_id in [*self._indexes, *self._building]:
+            self.invalidate(user_id)
+
+    def on_change(self, event: dict | None) -> None:
+        if event is None:
+            self.clear()
+        else:
+            self.invalidate(event["user_id"])
+
+    def _drop(self, user_id: int) -> bool:
+        entry = self._indexes.pop(user_id, None)
+        if entry is None:
+            return False
+        self.size -= entry[0].size
+        return True
+
+    def status(self) -> dict:
+        return {"users": len(self._indexes), "bytes": self.size, **self.stats}
+
+
+autocomplete_cache = AutocompleteCache()
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Callable
+
+from redis.exceptions import RedisError
+
+from app.conf.config import get_settings
+from app.database.redis_db import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "contacts:changes:"
+STREAM_PREFIX = "contacts:stream:"
+
+# Appends the event to the user's stream and publishes it with the stream id in one round trip.
+PUBLISH_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'action', ARGV[2], 'contact_id', ARGV[3])
+local event = cjson.encode({id = id, user_id = tonumber(ARGV[4]), action = ARGV[2], contact_id = tonumber(ARGV[3])})
+redis.call('PUBLISH', ARGV[5], event)
+return id
+"""
+
+
+def stream_key(user_id: int) -> str:
+    return f"{STREAM_PREFIX}{user_id}"
+
+
+def channel_name(user_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+def parse_event_id(event_id: str) -> tuple[int, int]:
+    """
+    Splits a Redis stream id (``<ms>-<seq>``) into a comparable tuple.
+
+    :param event_id: The stream id.
+    :type event_id: str
+    :return: Milliseconds and sequence number.
+    :rtype: tuple[int, int]
+    """
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def format_event(event: dict) -> str:
+    """
+    Renders a change event as a Server-Sent Events message.
+
+    :param event: Event with ``id``, ``action`` and ``contact_id``.
+    :type event: dict
+    :return: The SSE message.
+    :rtype: str
+    """
+    data = json.dumps({"action": event["action"], "contact_id": int(event["contact_id"])})
+    return f"id: {event['id']}\nevent: {event['action']}\ndata: {data}\n\n"
+
+
+async def publish_change(user_id: int, action: str, contact_id: int) -> None:
+    """
+    Records a contact change in the user's stream and notifies listening workers.
+
+    Failures are reported but never fail the write that triggered them; clients that
+    miss a live event still catch up from the stream when they reconnect.
+
+    :param user_id: The user who owns the contact.
+    :type user_id: int
+    :param action: ``created``, ``updated`` or ``deleted``.
+    :type action: str
+    :param contact_id: The changed contact.
+    :type contact_id: int
+    """
+    try:
+        await get_redis().eval(PUBLISH_SCRIPT, 1, stream_key(user_id), get_settings().change_feed_backlog,
+                               action, contact_id, user_id, channel_name(user_id))
+    except RedisError as e:
+        logger.warning("Could not publish contact change: %s", e)
+
+
+class ChangeFeedHub:
+    """
+    Fans out contact change events received over Redis pub/sub to local listeners.
+
+    Each worker keeps a single pattern subscription for all users, so an idle
+    client costs a queue here rather than a Redis connection of its own.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._listeners: dict[int, set[asyncio.Queue]] = {}
+        self._watchers: list[Callable[[dict | None], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def watch(self, callback: Callable[[dict | None], None]) -> None:
+        """
+        Calls ``callback`` with every change event for any user.
+
+        It is called with ``None`` after the subscription was re-established, since
+        events published while it was down are lost.
+
+        :param callback: Synchronous function run on the event loop.
+        :type callback: Callable[[dict | None], None]
+        """
+        self._ensure_running()
+        if callback not in self._watchers:
+            self._watchers.append(callback)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        self._ensure_running()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._listeners.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        listeners = self._listeners.get(user_id)
+        if listeners is None:
+            return
+        listeners.discard(queue)
+        if not listeners:
+            del self._listeners[user_id]
+
+    def dispatch(self, event: dict) -> None:
+        for callback in self._watchers:
+            callback(event)
+        for queue in list(self._listeners.get(event["user_id"], ())):
+            if queue.full():
+                # A slow client is cut off; it resumes from the stream with its last event id.
+                self.unsubscribe(event["user_id"], queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+            else:
+                queue.put_nowait(event)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        reconnecting = False
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                if reconnecting:
+                    for callback in self._watchers:
+                        callback(None)
+                reconnecting = True
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self.dispatch(json.loads(message["data"]))
+            except RedisError as e:
+                logger.warning("Change feed subscription lost: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+hub = ChangeFeedHub()
+
+
+async def stream_changes(user_id: int, last_event_id: str | None = None) -> AsyncIterator[str]:
+    """
+    Yields a user's contact changes as Server-Sent Events.
+
+    Events after ``last_event_id`` are replayed from the user's stream first, then live
+    events follow. Comments are sent while idle so proxies keep the connection open.
+
+    :param user_id: The user whose changes are streamed.
+    :type user_id: int
+    :param last_event_id: Id of the last event the client received, if resuming.
+    :type last_event_id: str, optional
+    :return: SSE messages.
+    :rtype: AsyncIterator[str]
+    """
+    settings = get_settings()
+    queue = hub.subscribe(user_id)
+    last_seen = None
+    try:
+        yield f"retry: {settings.change_feed_keepalive * 1000}\n\n"
+        if last_event_id:
+            backlog = await get_redis().xrange(stream_key(user_id), min=f"({last_event_id}", max="+")
+            for event_id, fields in backlog:
+                yield format_event({"id": event_id, **fields})
+                last_seen = parse_event_id(event_id)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.change_feed_keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            if last_seen is not None and parse_event_id(event["id"]) <= last_seen:
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(user_id, queue)
@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.conf.config import get_settings
+from app.database.redis_db import get_redis
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads into one call.
+
+    The first caller for a key runs the query and serializes the result once; callers
+    that arrive while it is in flight await the same JSON instead of querying again.
+    Query errors are shared with them, but if the first caller is cancelled (the client
+    went away) the others run the query themselves. With ``coalesce_remote`` enabled,
+    workers also coordinate through a short Redis lock. Only callers that arrive while
+    that lock is held get the leader's result; it is stored under the leader's own
+    flight id for ``coalesce_result_ttl_ms`` so they can collect it, and later reads
+    always query again.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.stats = {"executed": 0, "shared_local": 0, "shared_remote": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[BaseModel]]) -> bytes:
+        """
+        Returns the JSON of ``fn()``, sharing it with concurrent callers of the same key.
+
+        :param key: Identifies the query, including the user and every parameter.
+        :type key: str
+        :param fn: Runs the query and returns the response model.
+        :type fn: Callable[[], Awaitable[BaseModel]]
+        :return: The serialized response.
+        :rtype: bytes
+        """
+        while (future := self._inflight.get(key)) is not None:
+            result = await asyncio.shield(future)
+            if result is not None:
+                self.stats["shared_local"] += 1
+                return result
+            # The leader was cancelled before it had a result; retry, possibly as the new leader.
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if get_settings().coalesce_remote:
+                result = await self._do_remote(key, fn)
+            else:
+                result = await self._execute(fn)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it.
+            future.exception()
+            raise
+        except BaseException:
+            future.set_result(None)
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _execute(self, fn: Callable[[], Awaitable[BaseModel]]) -> bytes:
+        self.stats["executed"] += 1
+        return (await fn()).model_dump_json().encode()
+
+    async def _do_remote(self, key: str, fn: Callable[[], Awaitable[BaseModel]]) -> bytes:
+        settings = get_settings()
+        r = get_redis()
+        lock_key, flight = f"singleflight:lock:{key}", uuid.uuid4().hex
+        try:
+            if not await r.set(lock_key, flight, nx=True, px=settings.coalesce_lock_ms):
+                cached = await self._wait_for_remote(key, lock_key)
+                if cached is not None:
+                    self.stats["shared_remote"] += 1
+                    return cached.encode()
+                return await self._execute(fn)
+        except RedisError:
+            return await self._execute(fn)
+
+        try:
+            result = await self._execute(fn)
+            await r.set(f"singleflight:result:{key}:{flight}", result, px=settings.coalesce_result_ttl_ms)
+            return result
+        finally:
+            try:
+                await r.delete(lock_key)
+            except RedisError:
+                pass
+
+    async def _wait_for_remote(self, key: str, lock_key: str) -> str | None:
+        # Polls until the leader in another worker stores its result or gives up the lock.
+        r = get_redis()
+        flight = await r.get(lock_key)
+        if flight is None:
+            return None
+        result_key = f"singleflight:result:{key}:{flight}"
+        deadline = asyncio.get_running_loop().time() + get_settings().coalesce_lock_ms / 1000
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.01)
+            cached, current = await r.pipeline(transaction=False).get(result_key).get(lock_key).execute()
+            if cached is not None:
+                return cached
+            if current != flight:
+                # The leader may have stored its result just before releasing the lock.
+                return await r.get(result_key)
+        return None
+
+
+coalescer = SingleFlight()
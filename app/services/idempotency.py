@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.conf.config import get_settings
+from app.database.redis_db import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "idempotency:"
+MAX_KEY_LENGTH = 255
+
+# Each script acts only while KEYS[1] still holds the claim with token ARGV[1].
+EXTEND_CLAIM = """
+local stored = redis.call('GET', KEYS[1])
+if stored and cjson.decode(stored)['token'] == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+COMPLETE_CLAIM = """
+local stored = redis.call('GET', KEYS[1])
+if stored and cjson.decode(stored)['token'] == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+RELEASE_CLAIM = """
+local stored = redis.call('GET', KEYS[1])
+if stored and cjson.decode(stored)['token'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def request_fingerprint(body: BaseModel) -> str:
+    return hashlib.sha256(body.model_dump_json().encode()).hexdigest()
+
+
+class IdempotentRequests:
+    """
+    Runs a write at most once per ``Idempotency-Key`` and replays its response to retries.
+
+    The first request for a key claims it in Redis with a short lock, runs the write and
+    stores the serialized response for ``idempotency_ttl_seconds``. A retry that finds the
+    stored response gets it back without touching the database; one that arrives while
+    the first is still running waits for it, and gets 409 if it does not finish within
+    the lock. Reusing a key with a different payload is rejected with 422. A failed write
+    releases the key so the client can retry it. When Redis is unavailable the write runs
+    without protection.
+
+    Every claim carries a random token. The lock is extended while the write runs, so a
+    slow write is not repeated by a retry, and the claim is only completed or released
+    while it still holds that token, so an owner that lost its claim cannot overwrite
+    another request's record.
+    """
+
+    def __init__(self):
+        self.stats = {"executed": 0, "replayed": 0}
+
+    async def run(self, user_id: int, key: str, body: BaseModel,
+                  fn: Callable[[], Awaitable[BaseModel]]) -> tuple[bytes, bool]:
+        """
+        Runs ``fn`` once for the user's key and returns its JSON.
+
+        :param user_id: Keys are scoped per user.
+        :type user_id: int
+        :param key: The client's ``Idempotency-Key``.
+        :type key: str
+        :param body: The request payload, compared across retries.
+        :type body: BaseModel
+        :param fn: Performs the write and returns the response model.
+        :type fn: Callable[[], Awaitable[BaseModel]]
+        :return: The serialized response and whether it was replayed.
+        :rtype: tuple[bytes, bool]
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+        settings = get_settings()
+        r = get_redis()
+        redis_key = f"{KEY_PREFIX}{user_id}:{key}"
+        fingerprint = request_fingerprint(body)
+        token = uuid.uuid4().hex
+        pending = json.dumps({"state": "pending", "fingerprint": fingerprint, "token": token})
+
+        try:
+            while not await r.set(redis_key, pending, nx=True, px=settings.idempotency_lock_ms):
+                stored = await self._wait_for_result(redis_key)
+                if stored is None:
+                    # The first request failed or its lock expired; claim the key ourselves.
+                    continue
+                if stored["fingerprint"] != fingerprint:
+                    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                        detail="Idempotency-Key was already used with a different request")
+                if stored["state"] == "pending":
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                        detail="A request with this Idempotency-Key is still in progress")
+                self.stats["replayed"] += 1
+                return stored["response"].encode(), True
+        except RedisError as e:
+            logger.warning("Idempotency store unavailable, running write unprotected: %s", e)
+            return await self._execute(fn), False
+
+        heartbeat = asyncio.create_task(self._keep_claim(redis_key, token))
+        try:
+            result = await self._execute(fn)
+        except BaseException:
+            heartbeat.cancel()
+            try:
+                await r.register_script(RELEASE_CLAIM)(keys=[redis_key], args=[token])
+            except RedisError:
+                pass
+            raise
+        heartbeat.cancel()
+        done = json.dumps({"state": "done", "fingerprint": fingerprint, "token": token, "response": result.decode()})
+        try:
+            if not await r.register_script(COMPLETE_CLAIM)(keys=[redis_key],
+                                                           args=[token, done, settings.idempotency_ttl_seconds]):
+                logger.warning("Idempotency claim for %s was lost during the write; response not stored", redis_key)
+        except RedisError as e:
+            logger.warning("Could not store idempotent response: %s", e)
+        return result, False
+
+    async def _keep_claim(self, redis_key: str, token: str) -> None:
+        # Extends the pending claim every third of the lock while the write runs.
+        lock_ms = get_settings().idempotency_lock_ms
+        extend = get_redis().register_script(EXTEND_CLAIM)
+        while True:
+            await asyncio.sleep(lock_ms / 3000)
+            try:
+                if not await extend(keys=[redis_key], args=[token, lock_ms]):
+                    return
+            except RedisError as e:
+                logger.warning("Could not extend idempotency claim: %s", e)
+
+    async def _execute(self, fn: Callable[[], Awaitable[BaseModel]]) -> bytes:
+        self.stats["executed"] += 1
+        return (await fn()).model_dump_json().encode()
+
+    async def _wait_for_result(self, redis_key: str) -> dict | None:
+        # Polls while another request holds the key; returns the last stored state.
+        r = get_redis()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + get_settings().idempotency_lock_ms / 1000
+        while True:
+            stored = await r.get(redis_key)
+            if stored is None:
+                return None
+            stored = json.loads(stored)
+            if stored["state"] == "done" or loop.time() >= deadline:
+                return stored
+            await asyncio.sleep(0.05)
+
+
+idempotency = IdempotentRequests()
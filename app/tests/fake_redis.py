@@ -0,0 +1,77 @@
+import json
+import time
+
+from app.services import idempotency
+
+
+class InMemoryRedis:
+    """
+    Single-process stand-in for the Redis commands the services use, with key expiry.
+
+    Lua scripts cannot run here, so ``register_script`` maps each script the services
+    register to a Python equivalent.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and self._live(key):
+            return None
+        self.values[key] = value.decode() if isinstance(value, bytes) else value
+        self.expires.pop(key, None)
+        if px is not None or ex is not None:
+            self.expires[key] = time.monotonic() + (px / 1000 if px is not None else ex)
+        return True
+
+    async def get(self, key):
+        return self.values.get(key) if self._live(key) else None
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+        self.expires.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        redis, keys = self, []
+
+        class Pipeline:
+            def get(self, key):
+                keys.append(key)
+                return self
+
+            async def execute(self):
+                return [redis.values.get(key) if redis._live(key) else None for key in keys]
+
+        return Pipeline()
+
+    def register_script(self, source):
+        def claimed(key, token):
+            return self._live(key) and json.loads(self.values[key]).get("token") == token
+
+        async def extend_claim(keys, args):
+            if not claimed(keys[0], args[0]):
+                return 0
+            self.expires[keys[0]] = time.monotonic() + int(args[1]) / 1000
+            return 1
+
+        async def complete_claim(keys, args):
+            if not claimed(keys[0], args[0]):
+                return 0
+            await self.set(keys[0], args[1], ex=int(args[2]))
+            return 1
+
+        async def release_claim(keys, args):
+            if not claimed(keys[0], args[0]):
+                return 0
+            await self.delete(keys[0])
+            return 1
+
+        return {idempotency.EXTEND_CLAIM: extend_claim, idempotency.COMPLETE_CLAIM: complete_claim,
+                idempotency.RELEASE_CLAIM: release_claim}[source]
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Budgets in milliseconds; override through the environment on slow CI machines.
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", 2000))
+APP_SELF_TIME_BUDGET_MS = float(os.getenv("APP_SELF_TIME_BUDGET_MS", 150))
+# Import timings swing with machine load; budgets apply to the fastest of several runs.
+IMPORT_RUNS = int(os.getenv("IMPORT_RUNS", 5))
+
+# Modules that must only be loaded on first use, not when a worker imports the app.
+LAZY_MODULES = ("psycopg2", "fastapi_mail", "brotli", "zstandard")
+
+
+def import_profile(module: str) -> dict[str, tuple[int, int]]:
+    """
+    Imports ``module`` in a fresh interpreter under ``-X importtime``.
+
+    Settings are stripped from the environment so the import fails if anything reads them eagerly.
+    The garbage collector is disabled: a full collection runs whenever the allocation threshold trips
+    and its cost, tens of milliseconds, would be charged to whichever module happened to be importing.
+
+    :return: Mapping of module name to (self, cumulative) import time in microseconds.
+    """
+    env = {key: value for key, value in os.environ.items() if key in ("PATH", "HOME", "SYSTEMROOT")}
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import gc; gc.disable(); import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+class TestImportTime(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.profiles = [import_profile("main") for _ in range(IMPORT_RUNS)]
+        cls.profile = cls.profiles[0]
+
+    def test_main_import_within_budget(self):
+        cumulative_us = min(profile["main"][1] for profile in self.profiles)
+        self.assertLess(cumulative_us / 1000, IMPORT_TIME_BUDGET_MS)
+
+    def test_app_modules_self_time_within_budget(self):
+        app_self_us = min(sum(self_us for name, (self_us, _) in profile.items()
+                              if name == "main" or name.startswith("app."))
+                          for profile in self.profiles)
+        self.assertLess(app_self_us / 1000, APP_SELF_TIME_BUDGET_MS)
+
+    def test_heavy_modules_are_not_imported_eagerly(self):
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, self.profile)
+
+    def test_partial_contact_models_are_built_on_first_use(self):
+        env = {key: value for key, value in os.environ.items() if key in ("PATH", "HOME", "SYSTEMROOT")}
+        env["PYTHONPATH"] = str(PROJECT_ROOT)
+        result = subprocess.run(
+            [sys.executable, "-c", "import main; from app.models import contact_model as cm; "
+                                   "print(cm.partial_contact_model.cache_info().currsize, "
+                                   "cm.partial_page_model.cache_info().currsize)"],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.split(), ["0", "0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Query plan regression tests.
+
+Migrates a scratch Postgres database to head, seeds it with enough users and contacts
+that the planner prefers indexes wherever one applies, then runs every CRUD entry point
+while recording the SQL it sends. Each recorded statement is EXPLAINed and the test
+fails if the plan sequentially scans a table or reads more than one contacts partition.
+Runs only when ``TEST_DATABASE_URL`` points at a disposable database::
+
+    TEST_DATABASE_URL=postgresql+psycopg2://postgres@localhost/plans python -m pytest app/tests/test_query_plans.py
+"""
+import asyncio
+import json
+import os
+import unittest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.auth.auth import get_user_by_email
+from app.crud import contact_crud, stats_crud, sync_crud
+from app.crud.counter_crud import get_contact_count
+from app.models.contact_model import MergeRequestModel, PostRequestModel, PutRequestModel
+from app.models.db_models import User
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+USERS = 5000
+CONTACTS_PER_USER = 50
+
+RESET = ("TRUNCATE users, contacts, contact_tombstones, contact_counters, contact_stats "
+         "RESTART IDENTITY CASCADE")
+
+SEED = (
+    "INSERT INTO users (username, password, confirmed) "
+    f"SELECT 'user' || g || '@example.com', 'x', true FROM generate_series(1, {USERS}) g",
+    "INSERT INTO contacts (first_name, last_name, email, phone_number, birthday, created_at, updated_at, "
+    "user_id, email_key, phone_e164) "
+    "SELECT 'First' || c, 'Last' || c, 'c' || c || '@example.com', '0' || (500000000 + c), "
+    "date '1990-01-01' + c, now(), now(), u.id, 'c' || c || '@example.com', '+380' || (500000000 + c) "
+    f"FROM users u, generate_series(1, {CONTACTS_PER_USER}) c",
+    "INSERT INTO contact_tombstones (contact_id, user_id, deleted_at) "
+    "SELECT 1000000 + c, u.id, now() FROM users u, generate_series(1, 10) c",
+    f"INSERT INTO contact_counters (user_id, contact_count) SELECT id, {CONTACTS_PER_USER} FROM users",
+)
+
+
+def contact_partitions(plan: dict) -> set[str]:
+    found = {plan["Relation Name"]} if plan.get("Relation Name", "").startswith("contacts_p") else set()
+    for child in plan.get("Plans", []):
+        found |= contact_partitions(child)
+    return found
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestQueryPlans(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from alembic import command
+        from alembic.config import Config
+
+        config = Config("alembic.ini")
+        config.set_main_option("sqlalchemy.url", TEST_DATABASE_URL)
+        command.upgrade(config, "head")
+
+        cls.engine = create_engine(TEST_DATABASE_URL)
+        with cls.engine.begin() as connection:
+            # The database may be reused from an earlier run.
+            connection.execute(text(RESET))
+            for statement in SEED:
+                connection.execute(text(statement))
+        with Session(bind=cls.engine) as db:
+            asyncio.run(stats_crud.rebuild_stats(db))
+        with cls.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.record)
+        self.addCleanup(event.remove, self.engine, "before_cursor_execute", self.record)
+        publisher = patch("app.crud.contact_crud.publish_change", new_callable=AsyncMock)
+        publisher.start()
+        self.addCleanup(publisher.stop)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"):
+            # executemany sends one statement per parameter set; the first one stands for the rest.
+            if executemany:
+                parameters = parameters[0] if parameters else None
+            self.statements.append(cursor.mogrify(statement, parameters).decode())
+
+    def call(self, crud, *args, **kwargs):
+        with Session(bind=self.engine) as db:
+            return asyncio.run(crud(*args, db=db, **kwargs))
+
+    def export(self, **kwargs) -> str:
+        async def collect():
+            return "".join([chunk async for chunk in contact_crud.export_contacts_crud(db=db, **kwargs)])
+
+        with Session(bind=self.engine) as db:
+            return asyncio.run(collect())
+
+    def run_crud_layer(self) -> None:
+        user = self.call(get_user_by_email, "user42@example.com")
+        user = User(id=user.id, username=user.username)
+        contacts = self.call(contact_crud.get_contacts_crud, skip=0, limit=5, user=user).contacts
+        ids = [c.id for c in contacts]
+
+        self.call(contact_crud.create_contact_crud, body=PostRequestModel(
+            first_name="Plan", last_name="Check", email="plan@example.com", phone_number="0501234567",
+            birthday=date(1990, 5, 17)), user=user)
+        self.call(contact_crud.get_contacts_crud, skip=20, limit=10, user=user)
+        self.call(contact_crud.get_contacts_crud, skip=0, limit=10, user=user, fields=("first_name", "id"))
+        self.export(user=user, fields=("email", "id"), batch_size=20)
+        self.call(contact_crud.autocomplete_contacts_crud, q="fir", limit=10, user=user)
+        self.call(contact_crud.get_contact_crud, contact_id=ids[0], user=user)
+        self.call(contact_crud.update_contact_crud, body=PutRequestModel(email="moved@example.com"),
+                  contact_id=ids[0], user=user)
+        self.call(contact_crud.update_contact_crud, body=PutRequestModel(first_name="Renamed"),
+                  contact_id=ids[0], user=user)
+        self.call(contact_crud.get_contacts_by_phone_crud, phone_number="0500000001", user=user)
+        self.call(contact_crud.update_contact_crud, body=PutRequestModel(email=contacts[1].email),
+                  contact_id=ids[2], user=user)
+        self.call(contact_crud.find_duplicates_crud, user=user)
+        self.call(contact_crud.merge_contacts_crud, body=MergeRequestModel(primary_id=ids[1], duplicate_ids=[ids[2]]),
+                  user=user)
+        self.call(contact_crud.remove_contact_crud, contact_id=ids[3], user=user)
+        self.call(contact_crud.found_contact, first_name="First1", user=user)
+        self.call(sync_crud.get_changes_crud, since=None, limit=50, user=user)
+        self.call(stats_crud.get_stats_crud, user=user)
+        self.call(get_contact_count, user.id)
+        self.call(sync_crud.compact_tombstones)
+
+    def test_crud_queries_avoid_sequential_scans_and_stay_in_one_partition(self):
+        self.run_crud_layer()
+        self.assertTrue(self.statements)
+
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            for statement in self.statements:
+                with self.subTest(statement=statement):
+                    cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}")
+                    plan = cursor.fetchone()[0]
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    self.assertEqual(seq_scans(plan[0]["Plan"]), [])
+                    self.assertLessEqual(len(contact_partitions(plan[0]["Plan"])), 1)
+        finally:
+            connection.rollback()
+            connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
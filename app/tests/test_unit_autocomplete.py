@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.orm import Session
+
+from app.crud.contact_crud import autocomplete_contacts_crud
+from app.models.db_models import User
+from app.services.autocomplete import AutocompleteCache, PrefixIndex
+
+ROWS = [
+    (1, "Anna", "Smith", "anna@example.com"),
+    (2, "Andrew", "Brown", "drew@work.org"),
+    (3, "Bob", "Anders", "bob@example.com"),
+]
+
+
+class TestPrefixIndex(unittest.TestCase):
+
+    def test_matches_any_name_or_email_prefix_once(self):
+        index = PrefixIndex(ROWS)
+
+        self.assertEqual([r[0] for r in index.search("an", 10)], [3, 2, 1])
+        self.assertEqual([r[0] for r in index.search("drew@", 10)], [2])
+        self.assertEqual([r[0] for r in index.search("anna s", 10)], [1])
+        self.assertEqual(index.search("zed", 10), [])
+
+    def test_respects_limit(self):
+        self.assertEqual(len(PrefixIndex(ROWS).search("a", 2)), 2)
+
+
+class TestAutocompleteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = MagicMock(autocomplete_ttl=60, autocomplete_cache_bytes=10 ** 9)
+        settings = patch("app.services.autocomplete.get_settings", return_value=self.settings)
+        settings.start()
+        self.addCleanup(settings.stop)
+        hub = patch("app.services.autocomplete.hub")
+        hub.start()
+        self.addCleanup(hub.stop)
+        self.cache = AutocompleteCache()
+
+    def build(self, user_id: int) -> PrefixIndex:
+        self.cache.begin_build(user_id)
+        index = PrefixIndex(ROWS)
+        self.cache.put(user_id, index)
+        return index
+
+    def test_evicts_least_recently_used_over_budget(self):
+        index = self.build(1)
+        self.settings.autocomplete_cache_bytes = index.size * 2
+        self.build(2)
+        self.cache.get(1)
+        self.build(3)
+
+        self.assertIsNotNone(self.cache.get(1))
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.size, index.size * 2)
+
+    def test_change_event_invalidates_user(self):
+        self.build(1)
+
+        self.cache.on_change({"user_id": 1, "action": "created", "contact_id": 4})
+
+        self.assertIsNone(self.cache.get(1))
+
+    def test_index_built_across_a_change_is_not_cached(self):
+        self.cache.begin_build(1)
+        self.cache.invalidate(1)
+        self.cache.put(1, PrefixIndex(ROWS))
+
+        self.assertIsNone(self.cache.get(1))
+
+
+class TestAutocompleteCrud(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock(spec=Session)
+        self.db.query().filter().all.return_value = ROWS
+        cache = patch("app.crud.contact_crud.autocomplete_cache", AutocompleteCache())
+        cache.start()
+        self.addCleanup(cache.stop)
+        hub = patch("app.services.autocomplete.hub")
+        hub.start()
+        self.addCleanup(hub.stop)
+        settings = patch("app.services.autocomplete.get_settings",
+                         return_value=MagicMock(autocomplete_ttl=60, autocomplete_cache_bytes=10 ** 9))
+        settings.start()
+        self.addCleanup(settings.stop)
+
+    def test_second_lookup_is_served_from_cache(self):
+        user = User(id=1)
+
+        first = asyncio.run(autocomplete_contacts_crud("BO", 10, user, self.db))
+        second = asyncio.run(autocomplete_contacts_crud("ann", 10, user, self.db))
+
+        self.assertEqual([c.id for c in first], [3])
+        self.assertEqual([c.id for c in second], [1])
+        self.assertEqual(self.db.query().filter().all.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
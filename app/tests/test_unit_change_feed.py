@@ -0,0 +1,53 @@
+import asyncio
+import unittest
+
+from app.services.change_feed import ChangeFeedHub, format_event, parse_event_id
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def test_format_event(self):
+        message = format_event({"id": "1700000000000-0", "action": "created", "contact_id": "7"})
+
+        self.assertEqual(
+            message,
+            'id: 1700000000000-0\nevent: created\ndata: {"action": "created", "contact_id": 7}\n\n'
+        )
+
+    def test_parse_event_id_orders_by_time_then_sequence(self):
+        self.assertLess(parse_event_id("1700000000000-9"), parse_event_id("1700000000001-0"))
+        self.assertLess(parse_event_id("1700000000000-2"), parse_event_id("1700000000000-10"))
+
+    def test_dispatch_only_reaches_listeners_of_the_user(self):
+        hub = ChangeFeedHub(queue_size=2)
+        own, other = asyncio.Queue(maxsize=2), asyncio.Queue(maxsize=2)
+        hub._listeners = {1: {own}, 2: {other}}
+
+        hub.dispatch({"id": "1-0", "user_id": 1, "action": "deleted", "contact_id": 3})
+
+        self.assertEqual(own.get_nowait()["contact_id"], 3)
+        self.assertTrue(other.empty())
+
+    def test_dispatch_disconnects_slow_listener(self):
+        hub = ChangeFeedHub(queue_size=1)
+        queue = asyncio.Queue(maxsize=1)
+        hub._listeners = {1: {queue}}
+
+        hub.dispatch({"id": "1-0", "user_id": 1, "action": "created", "contact_id": 3})
+        hub.dispatch({"id": "2-0", "user_id": 1, "action": "created", "contact_id": 4})
+
+        self.assertIsNone(queue.get_nowait())
+        self.assertNotIn(1, hub._listeners)
+
+    def test_dispatch_reaches_watchers_for_every_user(self):
+        hub = ChangeFeedHub()
+        seen = []
+        hub._watchers = [seen.append]
+
+        hub.dispatch({"id": "1-0", "user_id": 5, "action": "updated", "contact_id": 3})
+
+        self.assertEqual(seen[0]["user_id"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
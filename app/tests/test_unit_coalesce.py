@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+
+from app.models.contact_model import ResponseMessageModel
+from app.services.coalesce import SingleFlight
+from app.tests.fake_redis import InMemoryRedis
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        settings = patch("app.services.coalesce.get_settings")
+        settings.start().return_value = MagicMock(coalesce_remote=False)
+        self.addCleanup(settings.stop)
+
+    def test_concurrent_calls_share_one_query(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ResponseMessageModel(message="ok")
+
+        async def run():
+            return await asyncio.gather(*(flight.do("key", query) for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(set(results), {b'{"message":"ok"}'})
+        self.assertEqual(flight.stats, {"executed": 1, "shared_local": 4, "shared_remote": 0})
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        async def query():
+            await asyncio.sleep(0.01)
+            raise HTTPException(status_code=404, detail="Contact not found")
+
+        async def run():
+            return await asyncio.gather(flight.do("key", query), flight.do("key", query), return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(r, HTTPException) and r.status_code == 404 for r in results))
+        self.assertEqual(flight._inflight, {})
+
+    def test_cancelled_leader_hands_over_to_waiters(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ResponseMessageModel(message="ok")
+
+        async def run():
+            leader = asyncio.create_task(flight.do("key", query))
+            await asyncio.sleep(0)
+            followers = [asyncio.create_task(flight.do("key", query)) for _ in range(2)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            return leader, await asyncio.gather(*followers)
+
+        leader, results = asyncio.run(run())
+
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(results, [b'{"message":"ok"}'] * 2)
+        self.assertEqual(calls, 2)
+        self.assertEqual(flight._inflight, {})
+
+    def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight()
+
+        async def query():
+            return ResponseMessageModel(message="ok")
+
+        asyncio.run(flight.do("key", query))
+        asyncio.run(flight.do("key", query))
+
+        self.assertEqual(flight.stats["executed"], 2)
+
+
+class TestRemoteSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = InMemoryRedis()
+        settings = patch("app.services.coalesce.get_settings")
+        settings.start().return_value = MagicMock(coalesce_remote=True, coalesce_lock_ms=500,
+                                                  coalesce_result_ttl_ms=100)
+        self.addCleanup(settings.stop)
+        redis = patch("app.services.coalesce.get_redis", return_value=self.redis)
+        redis.start()
+        self.addCleanup(redis.stop)
+        self.calls = 0
+
+    async def query(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return ResponseMessageModel(message=f"call {self.calls}")
+
+    def test_workers_share_a_read_in_flight(self):
+        async def run():
+            return await asyncio.gather(SingleFlight().do("key", self.query), SingleFlight().do("key", self.query))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [b'{"message":"call 1"}'] * 2)
+        self.assertEqual(self.calls, 1)
+
+    def test_finished_read_is_not_reused(self):
+        first = asyncio.run(SingleFlight().do("key", self.query))
+        second = asyncio.run(SingleFlight().do("key", self.query))
+
+        self.assertEqual((first, second), (b'{"message":"call 1"}', b'{"message":"call 2"}'))
+
+
+if __name__ == "__main__":
+    unittest.main()
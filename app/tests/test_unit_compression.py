@@ -0,0 +1,111 @@
+import asyncio
+import gzip
+import unittest
+import zlib
+from unittest.mock import MagicMock, patch
+
+from app.middleware.compression import CompressionMiddleware, available_encodings, negotiate_encoding
+
+BODY = b'{"first_name": "Olena", "last_name": "Shevchenko"}' * 100
+
+
+def app_sending(*chunks: bytes, content_type: str = "application/json", headers: list | None = None):
+    async def app(scope, receive, send):
+        raw = [(b"content-type", content_type.encode()), *(headers or [])]
+        if len(chunks) == 1:
+            raw.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": raw})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+
+def run(app, accept_encoding: str = "gzip") -> tuple[dict, list[dict]]:
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/contacts",
+             "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+    start = messages[0]
+    return {k.decode(): v.decode() for k, v in start["headers"]}, messages[1:]
+
+
+class TestNegotiateEncoding(unittest.TestCase):
+
+    def test_prefers_server_order_on_equal_quality(self):
+        self.assertEqual(negotiate_encoding("gzip, br, zstd", ("zstd", "br", "gzip")), "zstd")
+
+    def test_highest_quality_wins(self):
+        self.assertEqual(negotiate_encoding("gzip;q=1.0, br;q=0.5", ("zstd", "br", "gzip")), "gzip")
+
+    def test_zero_quality_and_unknown_encodings_are_excluded(self):
+        self.assertIsNone(negotiate_encoding("gzip;q=0, deflate", ("gzip",)))
+        self.assertIsNone(negotiate_encoding("", ("zstd", "br", "gzip")))
+
+    def test_wildcard_covers_unlisted_encodings(self):
+        self.assertEqual(negotiate_encoding("*;q=0.5, zstd;q=0", ("zstd", "br", "gzip")), "br")
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        settings = patch("app.middleware.compression.get_settings")
+        settings.start().return_value = MagicMock(
+            compression_enabled=True, compression_encodings=["gzip"], compression_minimum_size=1024,
+            compression_threadpool_size=65536, compression_gzip_level=6)
+        self.addCleanup(settings.stop)
+        available_encodings.cache_clear()
+        self.addCleanup(available_encodings.cache_clear)
+
+    def test_compresses_large_body(self):
+        headers, body = run(app_sending(BODY))
+
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertEqual(headers["vary"], "Accept-Encoding")
+        self.assertEqual(int(headers["content-length"]), len(body[0]["body"]))
+        self.assertEqual(gzip.decompress(body[0]["body"]), BODY)
+
+    def test_small_body_is_sent_as_is(self):
+        headers, body = run(app_sending(b'{"id": 1}'))
+
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(body[0]["body"], b'{"id": 1}')
+
+    def test_streamed_body_is_compressed_chunk_by_chunk(self):
+        headers, body = run(app_sending(BODY, BODY, BODY, content_type="text/csv; charset=utf-8"))
+
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertNotIn("content-length", headers)
+        self.assertEqual(len(body), 3)
+        decoder = zlib.decompressobj(31)
+        # Every chunk is flushed, so it decodes without waiting for the rest of the stream.
+        self.assertEqual(decoder.decompress(body[0]["body"]), BODY)
+        self.assertEqual(decoder.decompress(b"".join(message["body"] for message in body[1:])), BODY * 2)
+        self.assertFalse(body[-1]["more_body"])
+
+    def test_small_streamed_body_is_buffered_and_sent_as_is(self):
+        headers, body = run(app_sending(b"a,b\n", b"1,2\n", content_type="text/csv"))
+
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(body[0]["body"], b"a,b\n1,2\n")
+
+    def test_event_streams_and_encoded_responses_pass_through(self):
+        for app in (app_sending(BODY, BODY, content_type="text/event-stream"),
+                    app_sending(BODY, headers=[(b"content-encoding", b"identity")])):
+            with self.subTest(app=app):
+                headers, body = run(app)
+                self.assertNotEqual(headers.get("content-encoding"), "gzip")
+                self.assertEqual(body[0]["body"], BODY)
+
+    def test_unsupported_encoding_is_not_applied(self):
+        headers, body = run(app_sending(BODY), accept_encoding="deflate")
+
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(body[0]["body"], BODY)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,15 @@
 import unittest
 import asyncio
 from datetime import datetime, date
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from app.models.db_models import User, Contact
-from app.models.contact_model import PostRequestModel
-from app.crud.contact_crud import create_contact_crud, get_contacts_crud
+from app.models.db_models import User, Contact, ContactCounter
+from fastapi import HTTPException
+from app.models.contact_model import MergeRequestModel, PostRequestModel, PutRequestModel
+from app.crud.contact_crud import (create_contact_crud, get_contacts_crud, find_duplicates_crud, merge_contacts_crud,
+                                  update_contact_crud, remove_contact_crud, parse_contact_fields,
+                                  get_contact_crud, export_contacts_crud)
 
 
 class TestContactRepository(unittest.TestCase):
@@ -13,6 +17,12 @@ class TestContactRepository(unittest.TestCase):
     def setUp(self):
         self.db = MagicMock(spec=Session)
         self.user = User(id=1)
+        publisher = patch("app.crud.contact_crud.publish_change", new_callable=AsyncMock)
+        self.publish_change = publisher.start()
+        self.addCleanup(publisher.stop)
+        settings = patch("app.crud.contact_crud.get_settings")
+        settings.start().return_value = MagicMock(default_phone_country_code="380")
+        self.addCleanup(settings.stop)
 
     def test_create_contact_crud(self):
         data = PostRequestModel(
@@ -23,17 +33,51 @@ class TestContactRepository(unittest.TestCase):
             birthday="2000-01-01"
         )
 
-        self.db.add = MagicMock()
+        self.db.execute = MagicMock()
         self.db.commit = MagicMock()
-        self.db.refresh = MagicMock()
 
         # Act
         import asyncio
         asyncio.run(create_contact_crud(data, self.user, self.db))
 
         # Assert
-        self.db.add.assert_called()
+        self.db.execute.assert_called_once()
         self.db.commit.assert_called()
+        self.db.refresh.assert_not_called()
+        self.publish_change.assert_awaited_once()
+
+    def test_update_contact_crud_sets_only_supplied_fields(self):
+        data = PutRequestModel(last_name="Renamed")
+        self.db.execute().first.return_value = (1,)
+        self.db.execute.reset_mock()
+
+        # Act
+        asyncio.run(update_contact_crud(data, 1, self.user, self.db))
+
+        # Assert
+        stmt = self.db.execute.call_args[0][0]
+        self.assertEqual({c.key for c in stmt._values}, {"last_name", "updated_at"})
+        self.db.commit.assert_called()
+        self.publish_change.assert_awaited_once_with(1, "updated", 1)
+
+    def test_update_contact_crud_not_found(self):
+        self.db.execute().first.return_value = None
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(update_contact_crud(PutRequestModel(first_name="X"), 1, self.user, self.db))
+
+        self.assertEqual(ctx.exception.status_code, 404)
+        self.db.commit.assert_not_called()
+        self.publish_change.assert_not_awaited()
+
+    def test_remove_contact_crud_not_found(self):
+        self.db.execute().first.return_value = None
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(remove_contact_crud(1, self.user, self.db))
+
+        self.assertEqual(ctx.exception.status_code, 404)
+        self.db.commit.assert_not_called()
 
     def test_get_contacts_crud(self):
         mock_contact = Contact(
@@ -47,7 +91,8 @@ class TestContactRepository(unittest.TestCase):
             created_at=datetime.now(),
             updated_at=datetime.now()
         )
-        self.db.query().filter().offset().limit().all.return_value = [mock_contact]
+        self.db.query().filter().order_by().offset().limit().all.return_value = [mock_contact]
+        self.db.get.return_value = ContactCounter(user_id=1, contact_count=25)
 
         # Act
         result = asyncio.run(get_contacts_crud(0, 10, self.user, self.db))
@@ -56,6 +101,124 @@ class TestContactRepository(unittest.TestCase):
         self.assertEqual(result.skip, 0)
         self.assertEqual(result.limit, 10)
         self.assertEqual(len(result.contacts), 1)
+        self.assertEqual(result.total, 25)
+        self.db.close.assert_called_once()
+
+    def test_find_duplicates_crud(self):
+        def make_contact(contact_id, email, phone_number):
+            return Contact(
+                id=contact_id,
+                user_id=1,
+                first_name="Test",
+                last_name="User",
+                email=email,
+                phone_number=phone_number,
+                birthday=date(2000, 1, 1),
+                created_at=datetime.now(),
+                updated_at=datetime.now()
+            )
+
+        keys = [
+            (1, "a@example.com", "111"),
+            (2, "a@example.com", "222"),
+            (3, "c@example.com", "222"),
+            (4, "d@example.com", "444"),
+        ]
+        contacts = [make_contact(1, "a@example.com", "111"), make_contact(2, "A@example.com", "222"),
+                    make_contact(3, "c@example.com", "222")]
+        self.db.query().filter().all.side_effect = [keys, contacts]
+
+        # Act
+        result = asyncio.run(find_duplicates_crud(self.user, self.db))
+
+        # Assert
+        self.assertEqual(len(result.groups), 1)
+        self.assertEqual([c.id for c in result.groups[0].contacts], [1, 2, 3])
+
+    def merge_fixture(self):
+        def make_contact(contact_id, first_name, phone_number, phone_e164):
+            return Contact(id=contact_id, user_id=1, first_name=first_name, last_name="User",
+                           email="a@example.com", phone_number=phone_number, phone_e164=phone_e164,
+                           birthday=date(2000, 1, 1))
+
+        contacts = [make_contact(1, "", "n/a", None), make_contact(2, "Olena", "0501234567", "+380501234567"),
+                    make_contact(3, "Other", "0990000000", "+380990000000")]
+        keys = [(1, "a@example.com", None), (2, "a@example.com", "+380501234567"),
+                (3, "c@example.com", "+380990000000"), (4, "d@example.com", None)]
+        self.db.query().filter().with_for_update().all.return_value = contacts
+        self.db.query().filter().all.return_value = keys
+        return contacts
+
+    def test_merge_contacts_crud_fills_primary_from_duplicates(self):
+        primary, _, _ = contacts = self.merge_fixture()
+        self.db.query().filter().with_for_update().all.return_value = contacts[:2]
+        self.db.execute().all.return_value = [(2,)]
+
+        # Act
+        asyncio.run(merge_contacts_crud(MergeRequestModel(primary_id=1, duplicate_ids=[2]), self.user, self.db))
+
+        # Assert
+        self.assertEqual(primary.first_name, "Olena")
+        self.assertEqual((primary.phone_number, primary.phone_e164), ("0501234567", "+380501234567"))
+        # Stamped by the database clock, like every other write that sync windows are cut against.
+        self.assertEqual(str(primary.updated_at), str(func.now()))
+        self.db.commit.assert_called_once()
+        self.publish_change.assert_any_await(1, "deleted", 2)
+
+    def test_merge_contacts_crud_rejects_unrelated_contacts(self):
+        primary, _, _ = self.merge_fixture()
+        self.db.execute.reset_mock()
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(merge_contacts_crud(MergeRequestModel(primary_id=1, duplicate_ids=[2, 3]), self.user, self.db))
+
+        self.assertEqual(ctx.exception.status_code, 422)
+        self.assertEqual(primary.first_name, "")
+        self.db.execute.assert_not_called()
+        self.db.commit.assert_not_called()
+        self.publish_change.assert_not_awaited()
+
+    def test_parse_contact_fields_orders_and_adds_id(self):
+        self.assertIsNone(parse_contact_fields(None))
+        self.assertEqual(parse_contact_fields("last_name, first_name"), ("first_name", "last_name", "id"))
+        with self.assertRaises(HTTPException) as context:
+            parse_contact_fields("first_name,password")
+        self.assertEqual(context.exception.status_code, 422)
+
+    def test_get_contacts_crud_with_fields_selects_columns_only(self):
+        fields = ("id", "first_name")
+        self.db.query().filter().order_by().offset().limit().all.return_value = [(1, "Test"), (2, "Other")]
+        self.db.get.return_value = ContactCounter(user_id=1, contact_count=2)
+
+        # Act
+        result = asyncio.run(get_contacts_crud(0, 10, self.user, self.db, fields=fields))
+
+        # Assert
+        self.assertEqual(result.model_dump_json(),
+                         '{"contacts":[{"id":1,"first_name":"Test"},{"id":2,"first_name":"Other"}],'
+                         '"skip":0,"limit":10,"total":2}')
+        self.db.query.assert_called_with(Contact.id, Contact.first_name)
+
+    def test_get_contact_crud_with_fields_not_found(self):
+        self.db.query().filter().first.return_value = None
+
+        with self.assertRaises(HTTPException) as context:
+            asyncio.run(get_contact_crud(1, self.user, self.db, fields=("id", "email")))
+
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_export_contacts_crud_streams_csv_in_batches(self):
+        self.db.query().filter().order_by().limit().all.side_effect = [[(1, "Ann"), (2, "Bob")], [(3, "Cid")]]
+
+        async def collect():
+            return [chunk async for chunk in export_contacts_crud(self.user, self.db, ("id", "first_name"), 2)]
+
+        # Act
+        chunks = asyncio.run(collect())
+
+        # Assert
+        self.assertEqual("".join(chunks), "id,first_name\r\n1,Ann\r\n2,Bob\r\n3,Cid\r\n")
+        self.assertEqual(len(chunks), 2)
 
 
 if __name__ == "__main__":
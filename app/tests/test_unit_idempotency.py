@@ -0,0 +1,119 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+
+from app.models.contact_model import ResponseMessageModel
+from app.tests.fake_redis import InMemoryRedis
+from app.services.idempotency import IdempotentRequests
+
+
+class TestIdempotentRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = InMemoryRedis()
+        redis = patch("app.services.idempotency.get_redis", return_value=self.redis)
+        redis.start()
+        self.addCleanup(redis.stop)
+        settings = patch("app.services.idempotency.get_settings")
+        settings.start().return_value = MagicMock(idempotency_lock_ms=200, idempotency_ttl_seconds=60)
+        self.addCleanup(settings.stop)
+        self.requests = IdempotentRequests()
+        self.calls = 0
+
+    async def write(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return ResponseMessageModel(message="Contact is added")
+
+    def test_retry_replays_without_writing_again(self):
+        body = ResponseMessageModel(message="payload")
+
+        first = asyncio.run(self.requests.run(1, "key-1", body, self.write))
+        second = asyncio.run(self.requests.run(1, "key-1", body, self.write))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, (b'{"message":"Contact is added"}', False))
+        self.assertEqual(second, (b'{"message":"Contact is added"}', True))
+
+    def test_concurrent_duplicate_waits_for_first(self):
+        body = ResponseMessageModel(message="payload")
+
+        async def run():
+            return await asyncio.gather(*(self.requests.run(1, "key-1", body, self.write) for _ in range(3)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(replayed for _, replayed in results), [False, True, True])
+
+    def test_keys_are_scoped_per_user(self):
+        body = ResponseMessageModel(message="payload")
+
+        asyncio.run(self.requests.run(1, "key-1", body, self.write))
+        asyncio.run(self.requests.run(2, "key-1", body, self.write))
+
+        self.assertEqual(self.calls, 2)
+
+    def test_reused_key_with_different_payload_is_rejected(self):
+        asyncio.run(self.requests.run(1, "key-1", ResponseMessageModel(message="a"), self.write))
+
+        with self.assertRaises(HTTPException) as error:
+            asyncio.run(self.requests.run(1, "key-1", ResponseMessageModel(message="b"), self.write))
+
+        self.assertEqual(error.exception.status_code, 422)
+
+    def test_failed_write_releases_key(self):
+        body = ResponseMessageModel(message="payload")
+
+        async def failing():
+            raise HTTPException(status_code=409, detail="Contact already exists")
+
+        with self.assertRaises(HTTPException):
+            asyncio.run(self.requests.run(1, "key-1", body, failing))
+        asyncio.run(self.requests.run(1, "key-1", body, self.write))
+
+        self.assertEqual(self.calls, 1)
+
+
+    def test_write_outliving_the_lock_is_not_repeated(self):
+        body = ResponseMessageModel(message="payload")
+
+        async def slow_write():
+            self.calls += 1
+            await asyncio.sleep(0.5)
+            return ResponseMessageModel(message="Contact is added")
+
+        async def run():
+            first = asyncio.create_task(self.requests.run(1, "key-1", body, slow_write))
+            await asyncio.sleep(0.01)
+            retry = await asyncio.gather(self.requests.run(1, "key-1", body, slow_write), return_exceptions=True)
+            return await first, retry[0]
+
+        first, retry = asyncio.run(run())
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, (b'{"message":"Contact is added"}', False))
+        self.assertIsInstance(retry, HTTPException)
+        self.assertEqual(retry.status_code, 409)
+        replay = asyncio.run(self.requests.run(1, "key-1", body, slow_write))
+        self.assertEqual(replay, (b'{"message":"Contact is added"}', True))
+
+    def test_owner_that_lost_its_claim_does_not_overwrite_it(self):
+        body = ResponseMessageModel(message="payload")
+        other_claim = json.dumps({"state": "pending", "fingerprint": "other", "token": "other"})
+
+        async def write_while_claim_is_taken_over():
+            await self.redis.set("idempotency:1:key-1", other_claim)
+            return await self.write()
+
+        result = asyncio.run(self.requests.run(1, "key-1", body, write_while_claim_is_taken_over))
+
+        self.assertEqual(result, (b'{"message":"Contact is added"}', False))
+        self.assertEqual(asyncio.run(self.redis.get("idempotency:1:key-1")), other_claim)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.middleware.load_shedding import AdaptiveLimiter, LoadSheddingMiddleware, route_priority
+
+
+class TestRoutePriority(unittest.TestCase):
+
+    def test_auth_outranks_writes_and_reads(self):
+        self.assertLess(route_priority("POST", "/auth/login"), route_priority("POST", "/api/contact"))
+        self.assertLess(route_priority("POST", "/api/contact"), route_priority("GET", "/api/contacts"))
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+
+    def limiter(self, limit: int = 1, queue_size: int = 1) -> AdaptiveLimiter:
+        return AdaptiveLimiter(initial_limit=limit, min_limit=1, max_limit=10, queue_size=queue_size,
+                               target_latency=0.1)
+
+    def test_rejects_when_queue_is_full(self):
+        async def scenario():
+            limiter = self.limiter()
+            self.assertTrue(await limiter.acquire(2, 1))
+            waiter = asyncio.create_task(limiter.acquire(2, 1))
+            await asyncio.sleep(0)
+            rejected = await limiter.acquire(2, 1)
+            limiter.release(0.01)
+            return rejected, await waiter
+
+        rejected, admitted = asyncio.run(scenario())
+
+        self.assertFalse(rejected)
+        self.assertTrue(admitted)
+
+    def test_higher_priority_evicts_lower_priority_waiter(self):
+        async def scenario():
+            limiter = self.limiter()
+            await limiter.acquire(2, 1)
+            low = asyncio.create_task(limiter.acquire(2, 1))
+            await asyncio.sleep(0)
+            high = asyncio.create_task(limiter.acquire(0, 1))
+            await asyncio.sleep(0)
+            limiter.release(0.01)
+            return await low, await high, limiter.stats["evicted"]
+
+        low, high, evicted = asyncio.run(scenario())
+
+        self.assertFalse(low)
+        self.assertTrue(high)
+        self.assertEqual(evicted, 1)
+
+    def test_queue_wait_times_out(self):
+        async def scenario():
+            limiter = self.limiter()
+            await limiter.acquire(2, 1)
+            return await limiter.acquire(2, 0.01), limiter.queued
+
+        admitted, queued = asyncio.run(scenario())
+
+        self.assertFalse(admitted)
+        self.assertEqual(queued, 0)
+
+    def test_limit_shrinks_on_slow_requests_and_grows_on_fast_ones(self):
+        async def scenario():
+            limiter = self.limiter(limit=4)
+            for _ in range(4):
+                await limiter.acquire(2, 1)
+            limiter.release(0.5)
+            shrunk = limiter.limit
+            while limiter.inflight < int(limiter.limit):
+                await limiter.acquire(2, 1)
+            limiter.release(0.01)
+            return shrunk, limiter.limit
+
+        shrunk, grown = asyncio.run(scenario())
+
+        self.assertLess(shrunk, 4)
+        self.assertGreater(grown, shrunk)
+
+
+class TestLoadSheddingMiddleware(unittest.TestCase):
+
+    def test_shed_request_gets_503_with_retry_after(self):
+        settings = MagicMock(load_shed_enabled=True, load_shed_queue_timeout_ms=10, load_shed_retry_after=3)
+        limiter = MagicMock()
+        messages = []
+
+        async def app(scope, receive, send):
+            raise AssertionError("shed request reached the app")
+
+        async def send(message):
+            messages.append(message)
+
+        async def acquire(priority, timeout):
+            return False
+
+        limiter.acquire.side_effect = acquire
+        scope = {"type": "http", "method": "GET", "path": "/api/contacts", "headers": []}
+        with patch("app.middleware.load_shedding.get_settings", return_value=settings), \
+                patch("app.middleware.load_shedding.get_load_limiter", return_value=limiter):
+            asyncio.run(LoadSheddingMiddleware(app)(scope, None, send))
+
+        self.assertEqual(messages[0]["status"], 503)
+        self.assertIn((b"retry-after", b"3"), messages[0]["headers"])
+        limiter.release.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
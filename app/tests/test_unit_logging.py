@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import unittest
+
+from app.conf.log_config import (ACCESS_LOGGER, JsonFormatter, RequestContextFilter, SuccessSampler,
+                                 current_request_context, set_log_user)
+from app.middleware.access_log import AccessLogMiddleware
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.addFilter(RequestContextFilter())
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def access_record(status_code: int, latency_ms: float) -> logging.LogRecord:
+    record = logging.LogRecord(ACCESS_LOGGER, logging.INFO, __file__, 0, "GET /", None, None)
+    record.status_code = status_code
+    record.latency_ms = latency_ms
+    return record
+
+
+class TestJsonFormatter(unittest.TestCase):
+
+    def test_includes_extra_fields(self):
+        record = access_record(200, 1.5)
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry["message"], "GET /")
+        self.assertEqual(entry["status_code"], 200)
+        self.assertEqual(entry["latency_ms"], 1.5)
+        self.assertNotIn("args", entry)
+
+
+class TestSuccessSampler(unittest.TestCase):
+
+    def test_drops_fast_successes_at_zero_rate(self):
+        self.assertFalse(SuccessSampler(0.0, 500).filter(access_record(200, 10)))
+
+    def test_keeps_errors_and_slow_requests(self):
+        sampler = SuccessSampler(0.0, 500)
+
+        self.assertTrue(sampler.filter(access_record(404, 10)))
+        self.assertTrue(sampler.filter(access_record(200, 800)))
+
+
+class TestAccessLogMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        logger = logging.getLogger(ACCESS_LOGGER)
+        logger.addHandler(self.handler)
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.removeHandler, self.handler)
+
+    def run_request(self, headers: list) -> list:
+        async def app(scope, receive, send):
+            set_log_user(7)
+            current_request_context().db_ms += 2.5
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/api/contact", "headers": headers}
+        asyncio.run(AccessLogMiddleware(app)(scope, None, send))
+        return messages
+
+    def test_logs_request_with_context(self):
+        messages = self.run_request([])
+
+        record = self.handler.records[0]
+        self.assertEqual(record.status_code, 201)
+        self.assertEqual(record.user_id, 7)
+        self.assertEqual(record.db_ms, 2.5)
+        self.assertEqual(dict(messages[0]["headers"])[b"x-request-id"].decode(), record.request_id)
+
+    def test_reuses_incoming_request_id(self):
+        self.run_request([(b"x-request-id", b"abc123")])
+
+        self.assertEqual(self.handler.records[0].request_id, "abc123")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.crud.counter_crud import reconcile_contact_counters
+from main import run_periodically
+
+
+class TestReconcileContactCounters(unittest.TestCase):
+
+    def test_locks_then_updates_each_batch(self):
+        db = MagicMock(spec=Session)
+        db.scalars().all.side_effect = [[1, 2], [3], []]
+        db.scalars.reset_mock()
+
+        # Act
+        asyncio.run(reconcile_contact_counters(db, batch_size=2))
+
+        # Assert
+        lock = str(db.scalars.call_args_list[1][0][0].compile(dialect=postgresql.dialect()))
+        self.assertIn("contact_counters.user_id > ", lock)
+        self.assertTrue(lock.endswith("FOR UPDATE"))
+        update = str(db.execute.call_args_list[0][0][0].compile(dialect=postgresql.dialect()))
+        self.assertTrue(update.startswith("UPDATE contact_counters SET"))
+        self.assertIn(" FROM (SELECT contact_counters.user_id", update)
+        self.assertEqual(db.execute.call_count, 2)
+        self.assertEqual(db.commit.call_count, 3)
+
+
+class TestRunPeriodically(unittest.TestCase):
+
+    def run_once(self, claimed: bool) -> AsyncMock:
+        job = AsyncMock()
+        job.__name__ = "job"
+        redis = MagicMock()
+        redis.set = AsyncMock(return_value=claimed)
+        sleeps = [None, asyncio.CancelledError()]
+
+        async def sleep(_):
+            result = sleeps.pop(0)
+            if result is not None:
+                raise result
+
+        with patch("main.asyncio.sleep", sleep), patch("main.get_redis", return_value=redis), \
+                patch("main.SessionLocal"), patch("main.get_engine"):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(run_periodically(60, job))
+        redis.set.assert_awaited_once_with("maintenance:job", 1, nx=True, ex=60)
+        return job
+
+    def test_runs_job_when_claimed(self):
+        self.run_once(claimed=True).assert_awaited_once()
+
+    def test_skips_job_claimed_by_another_worker(self):
+        self.run_once(claimed=False).assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from app.crud.normalize import normalize_email, to_e164
+
+
+class TestNormalize(unittest.TestCase):
+
+    def test_normalize_email(self):
+        self.assertEqual(normalize_email("  Test@Example.COM "), "test@example.com")
+        self.assertIsNone(normalize_email("   "))
+
+    def test_to_e164(self):
+        self.assertEqual(to_e164("+1 (234) 567-890", "380"), "+1234567890")
+        self.assertEqual(to_e164("0044 20 7946 0958", "380"), "+442079460958")
+        self.assertEqual(to_e164("067 123 45 67", "380"), "+380671234567")
+        self.assertEqual(to_e164("380671234567", "380"), "+380671234567")
+
+    def test_to_e164_rejects_invalid_numbers(self):
+        self.assertIsNone(to_e164("12345", "380"))
+        self.assertIsNone(to_e164("+0123456789", "380"))
+        self.assertIsNone(to_e164("", "380"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.api.admin import require_profile_client
+from app.middleware.profiling import ProfileStore, ProfilingMiddleware, RequestProfile, StackSampler, profile_store
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestStackSampler(unittest.TestCase):
+
+    def test_samples_collapsed_stacks_of_target_thread(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        sampler = StackSampler(worker.ident, 0.001)
+        sampler.start()
+        time.sleep(0.05)
+        stacks = sampler.stop()
+        stop.set()
+        worker.join()
+
+        self.assertTrue(stacks)
+        self.assertTrue(all("busy_loop" in stack for stack in stacks))
+
+
+class TestProfilingMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = MagicMock(profiling_enabled=True, profile_allowed_ips=["127.0.0.1"],
+                                  profile_interval_ms=1.0, profile_dir=self.directory.name, profile_keep=10)
+        settings = patch("app.middleware.profiling.get_settings", return_value=self.settings)
+        settings.start()
+        self.addCleanup(settings.stop)
+        instrumentation = patch("app.middleware.profiling._instrumentation")
+        instrumentation.start()
+        self.addCleanup(instrumentation.stop)
+
+    def run_request(self, client_ip: str, headers: list) -> list:
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/api/contacts", "headers": headers,
+                 "client": (client_ip, 50000)}
+        asyncio.run(ProfilingMiddleware(app)(scope, None, send))
+        return messages
+
+    def test_profiles_allowlisted_request_with_header(self):
+        messages = self.run_request("127.0.0.1", [(b"x-profile", b"1")])
+
+        headers = dict(messages[0]["headers"])
+        profile_id = headers[b"x-profile-id"].decode()
+        self.assertEqual(profile_store.get(profile_id)["path"], "/api/contacts")
+        self.assertIsNotNone(profile_store.folded(profile_id))
+
+    def test_ignores_request_from_other_ip(self):
+        messages = self.run_request("10.0.0.5", [(b"x-profile", b"1")])
+
+        self.assertNotIn(b"x-profile-id", dict(messages[0]["headers"]))
+
+    def test_passes_through_when_disabled(self):
+        self.settings.profiling_enabled = False
+
+        messages = self.run_request("127.0.0.1", [(b"x-profile", b"1")])
+
+        self.assertNotIn(b"x-profile-id", dict(messages[0]["headers"]))
+
+
+    def test_store_serves_and_prunes_profiles_from_shared_directory(self):
+        self.settings.profile_keep = 2
+        directory = Path(self.directory.name)
+        stale, older, newer = (f"{n:032x}" for n in range(3))
+        # Left behind by a worker that has since restarted.
+        (directory / f"{stale}.json").write_text("{}")
+        (directory / f"{stale}.folded").write_text("")
+        os.utime(directory / f"{stale}.json", (0, 0))
+        profile_store.save(RequestProfile(id=older, method="GET", path="/api/contacts", started_at=0),
+                           Counter({"main;handler": 1}))
+        os.utime(directory / f"{older}.json", (1, 1))
+        profile_store.save(RequestProfile(id=newer, method="GET", path="/api/contact", started_at=0), Counter())
+
+        other_worker = ProfileStore()
+        self.assertEqual([p["id"] for p in other_worker.list()], [newer, older])
+        self.assertEqual(other_worker.folded(older), "main;handler 1")
+        self.assertIsNone(other_worker.get(stale))
+        self.assertFalse((directory / f"{stale}.folded").exists())
+        self.assertIsNone(other_worker.get("../" + older))
+
+    def test_admin_profiles_are_served_only_to_allowlisted_clients(self):
+        require_profile_client(MagicMock(client=MagicMock(host="127.0.0.1")))
+
+        for request in (MagicMock(client=MagicMock(host="10.0.0.5")), MagicMock(client=None),
+                        MagicMock(client=MagicMock(host="testclient"))):
+            with self.subTest(client=request.client), self.assertRaises(HTTPException) as error:
+                require_profile_client(request)
+            self.assertEqual(error.exception.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.auth.revocation import KEY_PREFIX, BloomFilter, RevocationList
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_is_near_target(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+
+        self.assertLess(false_positives, 300)
+
+
+class TestRevocationList(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.exists = AsyncMock(return_value=1)
+        self.redis.set = AsyncMock()
+        self.redis.publish = AsyncMock()
+        patcher = patch("app.auth.revocation.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.revocations = RevocationList()
+        self.revocations._task = MagicMock(done=MagicMock(return_value=False))
+
+    def test_unrevoked_token_is_checked_locally_once_synced(self):
+        self.revocations.filter = BloomFilter(100, 0.01)
+        self.revocations.synced = True
+
+        revoked = asyncio.run(self.revocations.is_revoked("fresh"))
+
+        self.assertFalse(revoked)
+        self.redis.exists.assert_not_called()
+
+    def test_filter_hit_is_confirmed_in_redis(self):
+        self.revocations.filter = BloomFilter(100, 0.01)
+        self.revocations.filter.add("gone")
+        self.revocations.synced = True
+
+        revoked = asyncio.run(self.revocations.is_revoked("gone"))
+
+        self.assertTrue(revoked)
+        self.redis.exists.assert_awaited_once_with(f"{KEY_PREFIX}gone")
+
+    def test_checks_redis_until_synced(self):
+        self.redis.exists.return_value = 0
+
+        revoked = asyncio.run(self.revocations.is_revoked("fresh"))
+
+        self.assertFalse(revoked)
+        self.redis.exists.assert_awaited_once()
+
+    def test_revoke_stores_with_remaining_lifetime_and_publishes(self):
+        self.revocations.filter = BloomFilter(100, 0.01)
+
+        asyncio.run(self.revocations.revoke("gone", time.time() + 60))
+
+        key, value = self.redis.set.await_args.args
+        self.assertEqual(key, f"{KEY_PREFIX}gone")
+        self.assertLessEqual(self.redis.set.await_args.kwargs["ex"], 60)
+        self.redis.publish.assert_awaited_once()
+        self.assertIn("gone", self.revocations.filter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy.orm import Session
+
+from app.crud.stats_crud import get_stats_crud
+from app.models.db_models import User
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock(spec=Session)
+        self.user = User(id=1)
+
+    def test_get_stats_crud_groups_buckets_by_dimension(self):
+        self.db.query().filter().all.return_value = [
+            ("email_domain", "example.com", 3),
+            ("birth_month", "11", 1),
+            ("birth_month", "02", 2),
+            ("added_week", "2026-10-12", 3),
+        ]
+
+        # Act
+        result = asyncio.run(get_stats_crud(self.user, self.db))
+
+        # Assert
+        self.assertEqual(result.by_email_domain, {"example.com": 3})
+        self.assertEqual(list(result.by_birth_month.items()), [("02", 2), ("11", 1)])
+        self.assertEqual(result.added_per_week, {"2026-10-12": 3})
+        self.db.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.crud.sync_crud import decode_sync_token, encode_sync_token, get_changes_crud
+from app.models.db_models import Contact, ContactTombstone, User
+
+
+class TestSync(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock(spec=Session)
+        self.user = User(id=1)
+        self.now = datetime(2026, 1, 1, 12, 0, 0)
+        self.db.scalar.return_value = self.now
+        settings = patch("app.crud.sync_crud.get_settings")
+        settings.start().return_value = MagicMock(sync_settle_seconds=5, tombstone_retention_days=30)
+        self.addCleanup(settings.stop)
+
+    def test_token_round_trip(self):
+        marks = ((datetime(2026, 1, 1, 10, 30, 0, 123456), 42), (datetime(2026, 1, 1, 11, 0), 7))
+
+        self.assertEqual(decode_sync_token(encode_sync_token(*marks)), marks)
+
+    def test_invalid_token(self):
+        with self.assertRaises(HTTPException) as ctx:
+            decode_sync_token("not-a-token")
+
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_expired_token(self):
+        old = self.now - timedelta(days=31)
+        token = encode_sync_token((old, 1), (old, 1))
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(get_changes_crud(token, 10, self.user, self.db))
+
+        self.assertEqual(ctx.exception.status_code, 410)
+
+    def test_changes_advance_watermarks(self):
+        updated_at = self.now - timedelta(minutes=1)
+        contact = Contact(id=3, user_id=1, first_name="Test", last_name="User", email="test@example.com",
+                          phone_number="1234567890", birthday=date(2000, 1, 1), created_at=updated_at,
+                          updated_at=updated_at)
+        tombstone = ContactTombstone(id=9, contact_id=4, user_id=1, deleted_at=updated_at)
+        self.db.query().filter().order_by().limit().all.side_effect = [[contact], [tombstone]]
+        since = encode_sync_token((self.now - timedelta(hours=1), 1), (self.now - timedelta(hours=1), 1))
+
+        # Act
+        result = asyncio.run(get_changes_crud(since, 10, self.user, self.db))
+
+        # Assert
+        self.assertEqual([c.id for c in result.contacts], [3])
+        self.assertEqual(result.deleted, [4])
+        self.assertFalse(result.has_more)
+        self.assertEqual(decode_sync_token(result.next_token), ((self.now, 0), (self.now, 0)))
+
+    def test_truncated_page_stops_at_last_row(self):
+        updated_at = self.now - timedelta(minutes=1)
+        contacts = [Contact(id=contact_id, user_id=1, first_name="Test", last_name="User", email="test@example.com",
+                            phone_number="1234567890", birthday=date(2000, 1, 1), created_at=updated_at,
+                            updated_at=updated_at) for contact_id in (3, 5)]
+        self.db.query().filter().order_by().limit().all.side_effect = [contacts, []]
+
+        # Act
+        result = asyncio.run(get_changes_crud(None, 1, self.user, self.db))
+
+        # Assert
+        self.assertEqual([c.id for c in result.contacts], [3])
+        self.assertTrue(result.has_more)
+        self.assertEqual(decode_sync_token(result.next_token), ((updated_at, 3), (self.now, 0)))
+
+    def test_token_without_deletes_does_not_expire(self):
+        self.db.query().filter().order_by().limit().all.return_value = []
+        result = asyncio.run(get_changes_crud(None, 10, self.user, self.db))
+
+        for day in range(1, 32):
+            self.db.scalar.return_value = self.now + timedelta(days=day)
+            result = asyncio.run(get_changes_crud(result.next_token, 10, self.user, self.db))
+
+        self.assertEqual(decode_sync_token(result.next_token)[1], (self.now + timedelta(days=31), 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
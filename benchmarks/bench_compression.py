@@ -0,0 +1,121 @@
+"""
+CPU time against bytes saved for each response encoding and level.
+
+Builds a contact list page and a CSV export shaped like the real responses, compresses
+them in one shot and in export-sized streaming chunks, and reports milliseconds of CPU,
+compressed size and the estimated time to deliver the body over a link of
+``--link-mbit`` (CPU plus transfer). A second table shows what small bodies gain, to
+pick ``compression_minimum_size``::
+
+    PYTHONPATH=. python benchmarks/bench_compression.py --contacts 1000 --link-mbit 10
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from app.middleware.compression import ENCODERS
+
+LEVELS = {"gzip": (1, 4, 6, 9), "br": (1, 4, 5, 6, 9, 11), "zstd": (1, 3, 6, 9, 19)}
+FIRST_NAMES = ["Olena", "Taras", "Iryna", "Andrii", "Maria", "Dmytro", "Sofia", "Oleksandr", "Anna", "Bohdan"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko", "Oliinyk", "Moroz", "Lysenko"]
+
+
+def make_contacts(count: int) -> list[dict]:
+    rng = random.Random(7)
+    created = datetime(2024, 1, 1)
+    contacts = []
+    for contact_id in range(1, count + 1):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        stamp = created + timedelta(seconds=rng.randrange(10 ** 7))
+        contacts.append({
+            "first_name": first_name, "last_name": last_name,
+            "email": f"{first_name}.{last_name}{rng.randrange(1000)}@example.com".lower(),
+            "phone_number": f"+380{rng.randrange(10 ** 9):09d}",
+            "birthday": (date(1960, 1, 1) + timedelta(days=rng.randrange(20000))).isoformat(),
+            "id": contact_id, "created_at": stamp.isoformat(), "updated_at": stamp.isoformat(),
+        })
+    return contacts
+
+
+def make_page(contacts: list[dict]) -> bytes:
+    return json.dumps({"contacts": contacts, "total": len(contacts), "skip": 0, "limit": len(contacts)}).encode()
+
+
+def make_csv(contacts: list[dict]) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(contacts[0]))
+    writer.writeheader()
+    writer.writerows(contacts)
+    return out.getvalue().encode()
+
+
+def chunks(body: bytes, size: int) -> list[bytes]:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def compress(encoding: str, level: int, parts: list[bytes]) -> bytes:
+    encoder = ENCODERS[encoding][1](level)
+    out = [encoder.compress(part) + encoder.flush() for part in parts[:-1]]
+    out.append(encoder.compress(parts[-1]) + encoder.finish())
+    return b"".join(out)
+
+
+def measure(encoding: str, level: int, parts: list[bytes], repeat: int) -> tuple[float, int]:
+    size = len(compress(encoding, level, parts))
+    started = time.process_time()
+    for _ in range(repeat):
+        compress(encoding, level, parts)
+    return (time.process_time() - started) / repeat * 1000, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--chunk-rows", type=int, default=1000)
+    parser.add_argument("--link-mbit", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    contacts = make_contacts(args.contacts)
+    page, export = make_page(contacts), make_csv(contacts)
+    row_bytes = len(export) // len(contacts)
+    bodies = {
+        "json page": [page],
+        "csv oneshot": [export],
+        "csv streamed": chunks(export, row_bytes * args.chunk_rows // 10),
+    }
+    bytes_per_ms = args.link_mbit * 1e6 / 8 / 1000
+
+    for label, parts in bodies.items():
+        raw = sum(map(len, parts))
+        print(f"\n{label}: {raw} bytes in {len(parts)} chunk(s), identity {raw / bytes_per_ms:.1f} ms on the wire")
+        print(f"{'encoding':10}{'level':>6}{'cpu ms':>9}{'bytes':>10}{'ratio':>7}{'total ms':>10}")
+        for encoding, levels in LEVELS.items():
+            for level in levels:
+                try:
+                    cpu, size = measure(encoding, level, parts, args.repeat)
+                except ImportError:
+                    break
+                total = cpu + size / bytes_per_ms
+                print(f"{encoding:10}{level:>6}{cpu:>9.2f}{size:>10}{raw / size:>7.2f}{total:>10.2f}")
+
+    print("\nsmall bodies (json, default levels)")
+    print(f"{'raw':>6}" + "".join(f"{encoding:>10}" for encoding in LEVELS))
+    defaults = {"gzip": 6, "br": 4, "zstd": 3}
+    for count in (1, 2, 4, 8, 16):
+        body = make_page(contacts[:count])
+        sizes = []
+        for encoding in LEVELS:
+            try:
+                sizes.append(f"{len(compress(encoding, defaults[encoding], [body])):>10}")
+            except ImportError:
+                sizes.append(f"{'-':>10}")
+        print(f"{len(body):>6}" + "".join(sizes))
+
+
+if __name__ == "__main__":
+    main()
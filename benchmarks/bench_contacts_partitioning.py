@@ -0,0 +1,105 @@
+"""
+List and write latency of the contacts table at scale.
+
+Seeds ``--rows`` contacts spread over ``--users`` users (server-side, with generate_series),
+then times the list query and a create/delete pair as issued by app.crud.contact_crud.
+Run it once before ``alembic upgrade a92d4e6c1b37`` and once after to compare the heap
+and the hash-partitioned layouts::
+
+    PYTHONPATH=. python benchmarks/bench_contacts_partitioning.py --rows 50000000 --users 100000
+
+Use a disposable database: seeding adds users and contacts.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import and_, insert, select, text
+
+from app.crud.contact_crud import _delete_contacts_stmt
+from app.database.db import get_engine
+from app.models.db_models import Contact
+
+SEED_USERS = text(
+    "INSERT INTO users (username, password, confirmed, created_at) "
+    "SELECT 'bench' || g || '@example.com', 'x', true, now() FROM generate_series(1, :users) g "
+    "ON CONFLICT (username) DO NOTHING"
+)
+
+SEED_CONTACTS = text(
+    "INSERT INTO contacts (first_name, last_name, email, phone_number, birthday, created_at, updated_at, "
+    "user_id, email_key, phone_e164) "
+    "SELECT 'First' || g, 'Last' || g, 'c' || g || '@example.com', '0' || (670000000 + g % 10000000), "
+    "date '1970-01-01' + (g % 18000), now(), now(), u.id, 'c' || g || '@example.com', "
+    "'+380' || (670000000 + g % 10000000) "
+    "FROM generate_series(:start, :stop) g "
+    "JOIN users u ON u.username = 'bench' || (1 + g % :users) || '@example.com'"
+)
+
+
+def seed(rows: int, users: int, batch: int) -> None:
+    engine = get_engine()
+    with engine.begin() as connection:
+        connection.execute(SEED_USERS, {"users": users})
+    for start in range(1, rows + 1, batch):
+        with engine.begin() as connection:
+            connection.execute(SEED_CONTACTS, {"start": start, "stop": min(start + batch - 1, rows), "users": users})
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE users"))
+        connection.execute(text("ANALYZE contacts"))
+
+
+def percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"p50={statistics.median(ordered) * 1000:.2f}ms p95={p95 * 1000:.2f}ms"
+
+
+def run(iterations: int) -> None:
+    engine = get_engine()
+    with engine.connect() as connection:
+        user_ids = connection.execute(
+            text("SELECT id FROM users WHERE username LIKE 'bench%' ORDER BY random() LIMIT :n"),
+            {"n": iterations}
+        ).scalars().all()
+
+    list_times, write_times = [], []
+    for user_id in user_ids:
+        with engine.begin() as connection:
+            started = time.perf_counter()
+            connection.execute(
+                select(Contact).where(Contact.user_id == user_id).offset(random.randint(0, 100)).limit(10)
+            ).all()
+            list_times.append(time.perf_counter() - started)
+
+        with engine.begin() as connection:
+            started = time.perf_counter()
+            contact_id = connection.execute(insert(Contact).values(
+                first_name="Bench", last_name="Write", email="bench@example.com", phone_number="0671234567",
+                birthday=date(2000, 1, 1), user_id=user_id
+            ).returning(Contact.id)).scalar_one()
+            connection.execute(_delete_contacts_stmt(and_(Contact.id == contact_id, Contact.user_id == user_id)))
+            write_times.append(time.perf_counter() - started)
+
+    print(f"list  {percentiles(list_times)}")
+    print(f"write {percentiles(write_times)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.rows, args.users, args.batch)
+    run(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Per-request cost of the access log on the event loop.
+
+Drives a trivial ASGI app through ``AccessLogMiddleware`` in-process and compares mean
+time per request with logging disabled, with a synchronous JSON handler writing to a
+file, and with the queued pipeline from ``setup_logging`` (formatting and I/O on the
+listener thread), at full and sampled success rates. ``--write-delay-us`` makes every
+write stall, as a full stdout pipe or a slow log shipper would::
+
+    PYTHONPATH=. python benchmarks/bench_logging.py --requests 20000 --write-delay-us 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from app.conf.log_config import (ACCESS_LOGGER, JsonFormatter, NonBlockingQueueHandler, RequestContextFilter,
+                                 SuccessSampler)
+from app.middleware.access_log import AccessLogMiddleware
+
+
+class SlowFile:
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(requests: int) -> float:
+    app = AccessLogMiddleware(endpoint)
+    scope = {"type": "http", "method": "GET", "path": "/api/contacts", "headers": []}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), None, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def measure(handler: logging.Handler | None, requests: int) -> float:
+    logger = logging.getLogger(ACCESS_LOGGER)
+    logger.handlers = [handler] if handler else []
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.disabled = handler is None
+    asyncio.run(drive(requests // 10))
+    return asyncio.run(drive(requests))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--write-delay-us", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sink = SlowFile(open(os.path.join(directory, "access.log"), "w"), args.write_delay_us / 1e6)
+        results = {"disabled": measure(None, args.requests)}
+
+        sync_handler = logging.StreamHandler(sink)
+        sync_handler.setFormatter(JsonFormatter())
+        sync_handler.addFilter(RequestContextFilter())
+        results["sync json"] = measure(sync_handler, args.requests)
+
+        for label, rate in (("queued json", 1.0), (f"queued sampled {args.sample_rate}", args.sample_rate)):
+            file_handler = logging.StreamHandler(sink)
+            file_handler.setFormatter(JsonFormatter())
+            log_queue = queue.Queue(maxsize=args.requests)
+            queue_handler = NonBlockingQueueHandler(log_queue)
+            queue_handler.addFilter(SuccessSampler(rate, 500))
+            queue_handler.addFilter(RequestContextFilter())
+            listener = QueueListener(log_queue, file_handler)
+            listener.start()
+            results[label] = measure(queue_handler, args.requests)
+            listener.stop()
+        sink.stream.close()
+
+    baseline = results["disabled"]
+    for label, per_request in results.items():
+        print(f"{label:22} {per_request:8.1f} us/request  overhead {per_request - baseline:6.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Pool occupancy with and without early connection release.
+
+Simulates concurrent requests that run one query and then spend ``--post-work`` seconds on
+serialization and background tasks while still holding their session, as a FastAPI
+handler does before the ``get_db`` finalizer runs. Samples ``pool.checkedout()`` while they
+run and reports mean and peak occupancy plus how many requests had to wait for a
+connection::
+
+    PYTHONPATH=. python benchmarks/bench_pool_occupancy.py --url postgresql+psycopg2://...
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+
+def simulate(url: str, requests: int, concurrency: int, post_work: float, release_early: bool) -> dict:
+    engine = create_engine(url, pool_size=5, max_overflow=0, pool_timeout=30)
+    session_factory = sessionmaker(bind=engine)
+    samples, waits = [], []
+    running = True
+
+    def sample():
+        while running:
+            samples.append(engine.pool.checkedout())
+            time.sleep(0.001)
+
+    def request():
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            db.execute(text("SELECT 1"))
+            waits.append(time.perf_counter() - started)
+            if release_early:
+                db.close()
+            time.sleep(post_work)
+        finally:
+            db.close()
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(requests):
+            executor.submit(request)
+    elapsed = time.perf_counter() - started
+    running = False
+    sampler.join()
+    engine.dispose()
+    return {
+        "mean_checked_out": statistics.mean(samples),
+        "peak_checked_out": max(samples),
+        "p95_first_query_ms": sorted(waits)[int(len(waits) * 0.95) - 1] * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_pool.db")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--post-work", type=float, default=0.01)
+    args = parser.parse_args()
+
+    for release_early in (False, True):
+        result = simulate(args.url, args.requests, args.concurrency, args.post_work, release_early)
+        label = "early release" if release_early else "held to finalizer"
+        print(f"{label:18} " + " ".join(f"{key}={value:.2f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,108 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from ipaddress import ip_address
 from typing import Callable
 
-import redis.asyncio as redis
 import uvicorn
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi_limiter import FastAPILimiter
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
 
-from app.api import contacts, auth_users
-from app.conf.config import settings
+from app.api import contacts, auth_users, admin
+from app.auth.auth import get_pwd_context
+from app.auth.revocation import revocations
+from app.conf.config import get_settings
+from app.conf.log_config import setup_logging
+from app.crud.counter_crud import reconcile_contact_counters
+from app.crud.sync_crud import compact_tombstones
+from app.database.db import SessionLocal, get_engine, prewarm_pool
+from app.database.redis_db import get_redis
+from app.middleware.access_log import AccessLogMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.change_feed import hub
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+async def prewarm_connections():
+    """
+    Opens database and Redis connections ahead of the first request.
+
+    Runs as a background task from the lifespan so it does not hold up the socket bind.
+    """
+    try:
+        get_pwd_context()
+        await run_in_threadpool(prewarm_pool, get_settings().db_prewarm_connections)
+        await get_redis().ping()
+    except Exception as e:
+        logger.warning("Connection pre-warm failed: %s", e)
+
+
+async def run_periodically(interval: int, job: Callable):
+    """
+    Runs a maintenance job with its own database session every ``interval`` seconds.
+
+    Every worker schedules the job, but each run is claimed with a Redis ``SET NX`` key
+    that lives for the interval, so the job runs once per interval across the deployment.
+    A run is skipped when Redis cannot be reached.
+
+    :param interval: Seconds between runs.
+    :type interval: int
+    :param job: Coroutine function taking the session.
+    :type job: Callable
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            claimed = await get_redis().set(f"maintenance:{job.__name__}", 1, nx=True, ex=interval)
+        except RedisError as e:
+            logger.warning("Skipping maintenance job %s, cannot claim it: %s", job.__name__, e)
+            continue
+        if not claimed:
+            continue
+        db = SessionLocal(bind=get_engine())
+        try:
+            await job(db)
+        except Exception:
+            logger.exception("Maintenance job %s failed", job.__name__)
+        finally:
+            db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    log_listener = setup_logging()
+    r = get_redis()
+    await FastAPILimiter.init(r)
+    background_tasks = [
+        asyncio.create_task(prewarm_connections()),
+        asyncio.create_task(run_periodically(settings.counter_reconcile_interval, reconcile_contact_counters)),
+        asyncio.create_task(run_periodically(settings.tombstone_compaction_interval, compact_tombstones)),
+    ]
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await hub.stop()
+    await revocations.stop()
+    await r.aclose()
+    log_listener.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AccessLogMiddleware)
 
 app.include_router(contacts.router)
 app.include_router(auth_users.router)
+app.include_router(admin.router)
 
 
 ALLOWED_IPS = [ip_address('192.168.1.0'), ip_address('172.16.0.0'), ip_address("127.0.0.1")]
@@ -27,13 +116,6 @@ async def limit_access_by_ip(request: Request, call_next: Callable):
     return response
 
 
-@app.on_event("startup")
-async def startup():
-    r = await redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
-                          decode_responses=True)
-    await FastAPILimiter.init(r)
-
-
 @app.get("/")
 def read_root():
     return {"message": "Hello World"}
@@ -41,4 +123,3 @@ def read_root():
 
 if __name__ == "__main__":
     uvicorn.run("app:app", reload=True)
-
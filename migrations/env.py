@@ -6,7 +6,6 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.models.db_models import Base
-from app.database.db import SQLALCHEMY_DATABASE_URL
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,46 @@
+"""Contact stats
+
+Revision ID: 3d6f0a8b2c74
+Revises: a92d4e6c1b37
+Create Date: 2026-10-20 09:31:26.118540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d6f0a8b2c74'
+down_revision: Union[str, None] = 'a92d4e6c1b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('contact_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(length=16), nullable=False),
+    sa.Column('bucket', sa.String(length=64), nullable=False),
+    sa.Column('contact_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'dimension', 'bucket')
+    )
+    # Same buckets as app.crud.stats_crud; later drift is fixed with its rebuild command.
+    op.execute(
+        "INSERT INTO contact_stats (user_id, dimension, bucket, contact_count) "
+        "SELECT user_id, dimension, bucket, count(*) FROM ("
+        "SELECT user_id, 'email_domain' AS dimension, "
+        "coalesce(nullif(split_part(email_key, '@', 2), ''), 'unknown') AS bucket FROM contacts "
+        "UNION ALL SELECT user_id, 'birth_month', coalesce(to_char(birthday, 'MM'), 'unknown') FROM contacts "
+        "UNION ALL SELECT user_id, 'added_week', "
+        "coalesce(to_char(date_trunc('week', created_at), 'YYYY-MM-DD'), 'unknown') FROM contacts"
+        ") AS buckets GROUP BY user_id, dimension, bucket"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('contact_stats')
@@ -0,0 +1,39 @@
+"""Contact counters
+
+Revision ID: 4a9d27f0c3e1
+Revises: e3f8a1c6b920
+Create Date: 2026-10-19 13:05:52.740311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9d27f0c3e1'
+down_revision: Union[str, None] = 'e3f8a1c6b920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('contact_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('contact_count', sa.Integer(), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        "INSERT INTO contact_counters (user_id, contact_count, reconciled_at) "
+        "SELECT users.id, count(contacts.id), now() FROM users "
+        "LEFT JOIN contacts ON contacts.user_id = users.id GROUP BY users.id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('contact_counters')
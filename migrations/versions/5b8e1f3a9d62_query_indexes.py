@@ -0,0 +1,67 @@
+"""Query indexes
+
+Adds the indexes the CRUD queries still scan without: (user_id, id) on contacts for
+paginated listing and lookups by id lists, and deleted_at on contact_tombstones for
+compaction. Every index is built CONCURRENTLY so writes keep flowing. Postgres cannot
+build an index concurrently on a partitioned table, so the contacts index is created
+invalid ON ONLY the parent, built concurrently on each partition and attached
+partition by partition; the parent becomes valid once the last one is attached.
+
+Revision ID: 5b8e1f3a9d62
+Revises: 3d6f0a8b2c74
+Create Date: 2026-10-20 14:12:07.904311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f3a9d62'
+down_revision: Union[str, None] = '3d6f0a8b2c74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_if_invalid(connection, name: str) -> None:
+    # A failed CREATE INDEX CONCURRENTLY leaves an invalid index that IF NOT EXISTS would keep.
+    invalid = connection.execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid AND c.relkind = 'i'"
+    ), {"name": name}).first()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY {name}")
+
+
+def create_partitioned_index(name: str, table: str, columns: str, suffix: str) -> None:
+    connection = op.get_bind()
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({columns})")
+    partitions = connection.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+    ), {"table": table}).scalars().all()
+    for partition in partitions:
+        index = f"{partition}_{suffix}"
+        drop_if_invalid(connection, index)
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {partition} ({columns})")
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {index}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        create_partitioned_index('ix_contacts_user_id_id', 'contacts', 'user_id, id', 'user_id_id_idx')
+        drop_if_invalid(op.get_bind(), 'ix_contact_tombstones_deleted_at')
+        op.create_index('ix_contact_tombstones_deleted_at', 'contact_tombstones', ['deleted_at'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contact_tombstones_deleted_at', table_name='contact_tombstones',
+                      postgresql_concurrently=True, if_exists=True)
+    # Indexes on partitioned tables cannot be dropped concurrently; this drops the partitions' too.
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
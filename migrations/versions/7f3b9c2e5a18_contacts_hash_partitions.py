@@ -0,0 +1,90 @@
+"""Contacts hash partitions
+
+Creates contacts_partitioned, hash-partitioned by user_id, and a trigger that mirrors
+every write on contacts into it. Existing rows are copied online afterwards with
+``python -m app.database.partitioning backfill``; revision a92d4e6c1b37 then swaps the
+tables.
+
+Revision ID: 7f3b9c2e5a18
+Revises: c5e2b8d74f16
+Create Date: 2026-10-19 16:48:33.617402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3b9c2e5a18'
+down_revision: Union[str, None] = 'c5e2b8d74f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+
+COLUMNS = ('id, first_name, last_name, email, phone_number, birthday, created_at, updated_at, '
+           'user_id, email_key, phone_e164')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "CREATE TABLE contacts_partitioned ("
+        "id INTEGER NOT NULL DEFAULT nextval('contacts_id_seq'), "
+        "first_name VARCHAR(50) NOT NULL, "
+        "last_name VARCHAR(50) NOT NULL, "
+        "email VARCHAR(50) NOT NULL, "
+        "phone_number VARCHAR(12) NOT NULL, "
+        "birthday DATE NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE, "
+        "updated_at TIMESTAMP WITHOUT TIME ZONE, "
+        "user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE, "
+        "email_key VARCHAR(50), "
+        "phone_e164 VARCHAR(16), "
+        "PRIMARY KEY (id, user_id)"
+        ") PARTITION BY HASH (user_id)"
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE contacts_p{remainder:02d} PARTITION OF contacts_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    # Indexes on the parent are created on every partition.
+    op.create_index('ix_contacts_part_user_id_email_key', 'contacts_partitioned', ['user_id', 'email_key'])
+    op.create_index('ix_contacts_part_user_id_phone_e164', 'contacts_partitioned', ['user_id', 'phone_e164'])
+    op.create_index('ix_contacts_part_user_id_updated_at', 'contacts_partitioned', ['user_id', 'updated_at', 'id'])
+
+    op.execute(f"""
+        CREATE FUNCTION contacts_mirror_to_partitioned() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.user_id IS DISTINCT FROM NEW.user_id) THEN
+                DELETE FROM contacts_partitioned WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.user_id IS NOT NULL THEN
+                INSERT INTO contacts_partitioned ({COLUMNS})
+                VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.email, NEW.phone_number, NEW.birthday,
+                        NEW.created_at, NEW.updated_at, NEW.user_id, NEW.email_key, NEW.phone_e164)
+                ON CONFLICT (id, user_id) DO UPDATE SET
+                    first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name,
+                    email = EXCLUDED.email, phone_number = EXCLUDED.phone_number,
+                    birthday = EXCLUDED.birthday, created_at = EXCLUDED.created_at,
+                    updated_at = EXCLUDED.updated_at, email_key = EXCLUDED.email_key,
+                    phone_e164 = EXCLUDED.phone_e164;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER contacts_mirror_to_partitioned AFTER INSERT OR UPDATE OR DELETE ON contacts "
+        "FOR EACH ROW EXECUTE FUNCTION contacts_mirror_to_partitioned()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS contacts_mirror_to_partitioned ON contacts")
+    op.execute("DROP FUNCTION IF EXISTS contacts_mirror_to_partitioned()")
+    op.drop_table('contacts_partitioned')
@@ -0,0 +1,79 @@
+"""Swap partitioned contacts
+
+Replaces contacts with contacts_partitioned. Refuses to run while rows are missing from
+the partitioned table, except on small tables, which are copied here directly. The old
+table is kept as contacts_unpartitioned so the swap can be reversed.
+
+Revision ID: a92d4e6c1b37
+Revises: 7f3b9c2e5a18
+Create Date: 2026-10-19 17:03:51.288930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.partitioning import COLUMNS, COPY_BATCH, missing_rows
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a92d4e6c1b37'
+down_revision: Union[str, None] = '7f3b9c2e5a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables at or below this many rows are copied inside the migration.
+INLINE_COPY_LIMIT = 100000
+
+INDEXES = ('user_id_email_key', 'user_id_phone_e164', 'user_id_updated_at')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT count(*) FROM contacts")).scalar()
+    if rows <= INLINE_COPY_LIMIT:
+        connection.execute(COPY_BATCH, {"after": 0, "until": 2 ** 31 - 1})
+    missing = missing_rows(connection)
+    if missing:
+        raise RuntimeError(f"{missing} contacts are not in contacts_partitioned yet; "
+                           "run 'python -m app.database.partitioning backfill' first")
+
+    op.execute("LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER contacts_mirror_to_partitioned ON contacts")
+    op.execute("DROP FUNCTION contacts_mirror_to_partitioned()")
+    op.rename_table('contacts', 'contacts_unpartitioned')
+    op.rename_table('contacts_partitioned', 'contacts')
+    op.execute("ALTER TABLE contacts_unpartitioned RENAME CONSTRAINT contacts_pkey TO contacts_unpartitioned_pkey")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT contacts_partitioned_pkey TO contacts_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX ix_contacts_{name} RENAME TO ix_contacts_unpartitioned_{name}")
+        op.execute(f"ALTER INDEX ix_contacts_part_{name} RENAME TO ix_contacts_{name}")
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY contacts.id")
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Leaves contacts_partitioned in place for revision 7f3b9c2e5a18 to drop, but without
+    the mirror trigger; upgrading again re-checks that no rows are missing.
+    """
+    op.execute("LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE")
+    # Bring writes made since the swap back into the unpartitioned table.
+    op.execute(
+        f"INSERT INTO contacts_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM contacts "
+        "ON CONFLICT (id) DO UPDATE SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, "
+        "email = EXCLUDED.email, phone_number = EXCLUDED.phone_number, birthday = EXCLUDED.birthday, "
+        "updated_at = EXCLUDED.updated_at, email_key = EXCLUDED.email_key, phone_e164 = EXCLUDED.phone_e164"
+    )
+    op.execute("DELETE FROM contacts_unpartitioned u WHERE u.user_id IS NOT NULL AND NOT EXISTS "
+               "(SELECT 1 FROM contacts c WHERE c.id = u.id AND c.user_id = u.user_id)")
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY contacts_unpartitioned.id")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT contacts_pkey TO contacts_partitioned_pkey")
+    op.execute("ALTER TABLE contacts_unpartitioned RENAME CONSTRAINT contacts_unpartitioned_pkey TO contacts_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX ix_contacts_{name} RENAME TO ix_contacts_part_{name}")
+        op.execute(f"ALTER INDEX ix_contacts_unpartitioned_{name} RENAME TO ix_contacts_{name}")
+    op.rename_table('contacts', 'contacts_partitioned')
+    op.rename_table('contacts_unpartitioned', 'contacts')
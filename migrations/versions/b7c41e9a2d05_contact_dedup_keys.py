@@ -0,0 +1,39 @@
+"""Contact dedup keys
+
+Revision ID: b7c41e9a2d05
+Revises: 8e347ffa9561
+Create Date: 2026-10-19 09:12:41.208316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e9a2d05'
+down_revision: Union[str, None] = '8e347ffa9561'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('email_key', sa.String(length=50), nullable=True))
+    op.add_column('contacts', sa.Column('phone_key', sa.String(length=12), nullable=True))
+    # Same normalization as app.crud.normalize.
+    op.execute(
+        "UPDATE contacts SET email_key = NULLIF(lower(trim(email)), ''), "
+        "phone_key = NULLIF(regexp_replace(phone_number, '\\D', '', 'g'), '')"
+    )
+    op.create_index('ix_contacts_user_id_email_key', 'contacts', ['user_id', 'email_key'], unique=False)
+    op.create_index('ix_contacts_user_id_phone_key', 'contacts', ['user_id', 'phone_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_phone_key', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_email_key', table_name='contacts')
+    op.drop_column('contacts', 'phone_key')
+    op.drop_column('contacts', 'email_key')
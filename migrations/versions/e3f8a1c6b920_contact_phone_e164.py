@@ -0,0 +1,53 @@
+"""Contact phone E.164
+
+Revision ID: e3f8a1c6b920
+Revises: b7c41e9a2d05
+Create Date: 2026-10-19 11:40:07.512983
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f8a1c6b920'
+down_revision: Union[str, None] = 'b7c41e9a2d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Default of Settings.default_phone_country_code at the time of this migration.
+DEFAULT_COUNTRY_CODE = '380'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('phone_e164', sa.String(length=16), nullable=True))
+    # Same rules as app.crud.normalize.to_e164.
+    op.execute(
+        sa.text(
+            "UPDATE contacts SET phone_e164 = CASE WHEN n.candidate ~ '^\\+[1-9][0-9]{7,14}$' "
+            "THEN n.candidate END "
+            "FROM (SELECT id, '+' || CASE "
+            "WHEN ltrim(phone_number) LIKE '+%' THEN digits "
+            "WHEN digits LIKE '00%' THEN substr(digits, 3) "
+            "WHEN digits LIKE '0%' THEN :country_code || substr(digits, 2) "
+            "ELSE digits END AS candidate "
+            "FROM (SELECT id, phone_number, regexp_replace(phone_number, '\\D', '', 'g') AS digits "
+            "FROM contacts) AS d) AS n "
+            "WHERE contacts.id = n.id"
+        ).bindparams(country_code=DEFAULT_COUNTRY_CODE)
+    )
+    op.create_index('ix_contacts_user_id_phone_e164', 'contacts', ['user_id', 'phone_e164'], unique=False)
+    op.drop_index('ix_contacts_user_id_phone_key', table_name='contacts')
+    op.drop_column('contacts', 'phone_key')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('contacts', sa.Column('phone_key', sa.String(length=12), nullable=True))
+    op.execute("UPDATE contacts SET phone_key = NULLIF(regexp_replace(phone_number, '\\D', '', 'g'), '')")
+    op.create_index('ix_contacts_user_id_phone_key', 'contacts', ['user_id', 'phone_key'], unique=False)
+    op.drop_index('ix_contacts_user_id_phone_e164', table_name='contacts')
+    op.drop_column('contacts', 'phone_e164')